@@ -3,6 +3,9 @@ import sys
 import math
 import random
 import copy # Keep for AI
+from asset_cache import get_font, load_sprites
+# The search, mate solver, analysis cache (sqlite3), profiler and history modules are imported
+# where they are first used: the server and dataset workers import this module for ChessGame only
 
 # --- Constants (Keep from original logic) ---
 WIDTH = 8
@@ -19,20 +22,41 @@ PIECES = {
 PIECE_VALUES = {
     'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 1000
 }
+AI_MOVE_TIME = 3.0 # Seconds per move for the level 3 AI
+ANALYSIS_CACHE_PATH = 'analysis.sqlite3' # Level 3 search results kept between games
+MATE_SOLVER_MOVES = 3 # 'm' key: longest mate looked for
+MATE_SOLVER_TIME = 10.0
+
+# Rays and jumps for move generation and static exchange evaluation, as (row, col) steps
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS # Also the queen's directions
+
+# Zobrist keys for position hashing (fixed seed, so hashes are stable across runs and processes)
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = {piece: [[_zobrist_random.getrandbits(64) for _ in range(WIDTH)] for _ in range(HEIGHT)]
+                  for piece in PIECES if piece is not None}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
 
 # --- Pygame Specific Constants ---
 SQ_SIZE = 64 # Size of each square in pixels
 BOARD_WIDTH = WIDTH * SQ_SIZE
 BOARD_HEIGHT = HEIGHT * SQ_SIZE
 SCREEN_WIDTH = BOARD_WIDTH
-SCREEN_HEIGHT = BOARD_HEIGHT # Can add space for status messages later
+SLIDER_HEIGHT = 24 # Move history slider below the board
+SCREEN_HEIGHT = BOARD_HEIGHT + SLIDER_HEIGHT
 IMAGES = {} # Dictionary to hold loaded piece images
+DRAW_MESSAGES = {'stalemate': "Stalemate! It's a Draw!", '50-move rule': "Draw by the 50-move rule!",
+                 'repetition': "Draw by repetition!"}
 
 # Colors
 WHITE = (235, 235, 208)
 BLACK = (119, 148, 85)
 HIGHLIGHT_COLOR = (255, 255, 51, 150) # Yellowish with transparency
 VALID_MOVE_COLOR = (135, 152, 105, 150) # Darker green overlay
+SLIDER_COLOR = (60, 60, 60)
+SLIDER_FILL_COLOR = (119, 148, 85)
 
 # --- ChessGame Class (Mostly Unchanged) ---
 # (Paste the entire ChessGame class from the previous AI example here)
@@ -47,15 +71,33 @@ VALID_MOVE_COLOR = (135, 152, 105, 150) # Darker green overlay
 class ChessGame:
     """Represents the state and rules of a chess game."""
 
-    def __init__(self, ai_difficulty=None):
-        """Initializes the board, game state, and AI difficulty."""
+    def __init__(self, ai_difficulty=None, analysis_cache=None):
+        """Initializes the board, game state, and AI difficulty (``analysis_cache``: see analysis_cache.py)."""
         self.board = self._setup_board()
+        self._index_pieces()
         self.current_turn = 'w' # 'w' for white, 'b' for black
-        self.ai_difficulty = ai_difficulty # None for PvP, 0, 1, 2 for AI levels
+        self.ai_difficulty = ai_difficulty # None for PvP, 0, 1, 2, 3 for AI levels
         self.move_log = [] # Optional: To keep track of moves
         # --- Add game over state ---
         self.game_over = False
         self.winner = None # 'w', 'b', or 'draw'
+        self.draw_reason = None # With a draw: 'stalemate', '50-move rule' or 'repetition'
+        # --- Draw rules: position hashes since the start, halfmove clock for the 50-move rule ---
+        self.position_hash = self.zobrist_hash()
+        self.position_history = [self.position_hash]
+        self.halfmove_clock = 0
+        self.halfmove_history = [] # Clock values before each move, popped by undo_move
+        # --- Level 3 AI: the searcher is created on first use, then keeps its transposition table between moves ---
+        self.analysis_cache = analysis_cache
+        self._searcher = None
+        self.last_search = None
+
+    @property
+    def searcher(self):
+        if self._searcher is None:
+            from search import Searcher
+            self._searcher = Searcher(cache=self.analysis_cache)
+        return self._searcher
 
     def _setup_board(self):
         board = [[None for _ in range(WIDTH)] for _ in range(HEIGHT)]
@@ -65,6 +107,102 @@ class ChessGame:
         board[7] = ['wR', 'wN', 'wB', 'wQ', 'wK', 'wB', 'wN', 'wR']
         return board
 
+    def _index_pieces(self):
+        """Rebuilds piece_squares: piece code ('wP'...'bK') -> set of (row, col), kept in sync by
+        make_move/undo_move so piece loops and find_king do not scan the 64 squares."""
+        self.piece_squares = {color + kind: set() for color in 'wb' for kind in 'PNBRQK'}
+        for r, row in enumerate(self.board):
+            for c, piece in enumerate(row):
+                if piece is not None:
+                    self.piece_squares[piece].add((r, c))
+
+    def iter_pieces(self, color):
+        """Yields (square, piece) for the pieces of ``color``, in board order."""
+        squares = [(square, color + kind) for kind in 'PNBRQK' for square in self.piece_squares[color + kind]]
+        squares.sort()
+        yield from squares
+
+    def load_fen(self, fen):
+        """Sets the board and side to move from a FEN string (castling/en passant ignored)."""
+        fields = fen.split()
+        self.board = [[None for _ in range(WIDTH)] for _ in range(HEIGHT)]
+        for r, rank in enumerate(fields[0].split('/')):
+            c = 0
+            for char in rank:
+                if char.isdigit():
+                    c += int(char)
+                else:
+                    self.board[r][c] = ('w' if char.isupper() else 'b') + char.upper()
+                    c += 1
+        self._index_pieces()
+        self.current_turn = fields[1] if len(fields) > 1 else 'w'
+        self.move_log = []
+        self.game_over = False
+        self.winner = None
+        self.draw_reason = None
+        self.position_hash = self.zobrist_hash()
+        self.position_history = [self.position_hash]
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self.halfmove_history = []
+
+    def get_fen(self):
+        """Returns the piece placement and side to move as a FEN string."""
+        ranks = []
+        for r in range(HEIGHT):
+            rank = ''
+            empty = 0
+            for c in range(WIDTH):
+                piece = self.board[r][c]
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                rank += piece[1] if piece[0] == 'w' else piece[1].lower()
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+        return f"{'/'.join(ranks)} {self.current_turn} - - {self.halfmove_clock} 1"
+
+    def copy(self):
+        """Independent copy of the game state (sharing the searcher), e.g. for a background search."""
+        other = copy.copy(self)
+        other.board = [row[:] for row in self.board]
+        other.piece_squares = {piece: squares.copy() for piece, squares in self.piece_squares.items()}
+        other.move_log = self.move_log[:]
+        other.position_history = self.position_history[:]
+        other.halfmove_history = self.halfmove_history[:]
+        return other
+
+    def zobrist_hash(self):
+        """64-bit hash of the piece placement and side to move."""
+        key = ZOBRIST_BLACK_TO_MOVE if self.current_turn == 'b' else 0
+        for r in range(HEIGHT):
+            for c in range(WIDTH):
+                piece = self.board[r][c]
+                if piece is not None:
+                    key ^= ZOBRIST_PIECES[piece][r][c]
+        return key
+
+    def is_repetition(self, times=3, search_root=None):
+        """True if the current position occurred at least `times` times.
+        Only positions since the last capture or pawn move can repeat, so the scan stops there.
+        Inside a search, ``search_root`` is len(position_history) at the root: a single repeat
+        of a position from the search line (the root or later) is enough, positions only seen
+        in the game before the root still need `times` occurrences."""
+        history = self.position_history
+        count = 1
+        oldest = max(len(history) - 1 - self.halfmove_clock, 0)
+        for i in range(len(history) - 3, oldest - 1, -2): # Same side to move: every other ply
+            if history[i] == self.position_hash:
+                if search_root is not None and i >= search_root - 1:
+                    return True
+                count += 1
+                if count >= times:
+                    return True
+        return False
+
     # --- Keep all the validation and move logic methods ---
     # get_piece_at, parse_move, is_valid_square, is_valid_move,
     # _is_valid_pawn_move, _is_valid_rook_move, ... King, _is_path_clear
@@ -200,9 +338,25 @@ class ChessGame:
                 promoted_to = piece[0] + 'Q'
                 self.board[end_row][end_col] = promoted_to
 
+        # Piece index: the moved piece, the captured one and a promotion
+        self.piece_squares[piece].discard((start_row, start_col))
+        if captured_piece is not None:
+            self.piece_squares[captured_piece].discard((end_row, end_col))
+        self.piece_squares[self.board[end_row][end_col]].add((end_row, end_col))
+
         # Log move before switching turn
         self.move_log.append(((start_row, start_col), (end_row, end_col), captured_piece, promoted_to))
 
+        # Update the hash incrementally and the 50-move clock
+        key = self.position_hash ^ ZOBRIST_PIECES[piece][start_row][start_col] ^ ZOBRIST_BLACK_TO_MOVE
+        if captured_piece is not None:
+            key ^= ZOBRIST_PIECES[captured_piece][end_row][end_col]
+        key ^= ZOBRIST_PIECES[self.board[end_row][end_col]][end_row][end_col]
+        self.position_hash = key
+        self.position_history.append(key)
+        self.halfmove_history.append(self.halfmove_clock)
+        self.halfmove_clock = 0 if piece[1] == 'P' or captured_piece is not None else self.halfmove_clock + 1
+
         # Switch turn
         self.current_turn = 'b' if self.current_turn == 'w' else 'w'
 
@@ -225,6 +379,15 @@ class ChessGame:
         self.board[start_row][start_col] = original_moved_piece
         # Restore captured piece (or None if it was empty)
         self.board[end_row][end_col] = captured_piece
+        self.piece_squares[moved_piece_after_move].discard((end_row, end_col))
+        self.piece_squares[original_moved_piece].add((start_row, start_col))
+        if captured_piece is not None:
+            self.piece_squares[captured_piece].add((end_row, end_col))
+
+        # Restore hash and 50-move clock
+        self.position_history.pop()
+        self.position_hash = self.position_history[-1]
+        self.halfmove_clock = self.halfmove_history.pop()
 
         # Switch turn back
         self.current_turn = 'b' if self.current_turn == 'w' else 'w'
@@ -232,54 +395,109 @@ class ChessGame:
         # --- Reset game over state if undoing ---
         self.game_over = False
         self.winner = None
+        self.draw_reason = None
         return True
 
+    def make_null_move(self):
+        """Passes the turn (search only: null-move pruning). Not logged, and repetitions do not reach across it."""
+        self.position_hash ^= ZOBRIST_BLACK_TO_MOVE
+        self.position_history.append(self.position_hash)
+        self.halfmove_history.append(self.halfmove_clock)
+        self.halfmove_clock = 0
+        self.current_turn = 'b' if self.current_turn == 'w' else 'w'
+
+    def undo_null_move(self):
+        self.position_history.pop()
+        self.position_hash = self.position_history[-1]
+        self.halfmove_clock = self.halfmove_history.pop()
+        self.current_turn = 'b' if self.current_turn == 'w' else 'w'
+
     def _coords_to_algebraic(self, pos):
         row, col = pos
         if not self.is_valid_square(row, col): return "Invalid"
         return f"{chr(ord('a') + col)}{8 - row}"
 
     def generate_all_valid_moves(self, color):
-        valid_moves = []
-        for r_start in range(HEIGHT):
-            for c_start in range(WIDTH):
-                piece = self.get_piece_at(r_start, c_start)
-                if piece and piece[0] == color:
-                    for r_end in range(HEIGHT):
-                        for c_end in range(WIDTH):
-                            start_pos = (r_start, c_start)
-                            end_pos = (r_end, c_end)
-                            # Temporarily switch turn to check validity from the perspective of 'color'
-                            original_turn = self.current_turn
-                            self.current_turn = color
-                            is_valid = self.is_valid_move(start_pos, end_pos, turn_color=color)
-                            self.current_turn = original_turn # Switch back!
-
-                            if is_valid:
-                                # --- Add check detection simulation (basic) ---
-                                # # Simulate the move
-                                # moved_p, captured_p = self.make_move(start_pos, end_pos)
-                                # # Check if the king of 'color' is now in check
-                                # in_check = self.is_king_in_check(color)
-                                # # Undo the move
-                                # self.undo_move()
-                                # # Only add if move doesn't leave king in check
-                                # if not in_check:
-                                #     valid_moves.append((start_pos, end_pos))
-                                # Currently, we skip the check detection part for simplicity
-                                valid_moves.append((start_pos, end_pos))
-
-        return valid_moves
+        """Every move is_valid_move accepts for ``color``, ordered by start then end square."""
+        return sorted(self.iter_moves(color))
+
+    def iter_moves(self, color, hash_move=None):
+        """Yields the moves of generate_all_valid_moves in stages: ``hash_move`` (if valid), captures,
+        then quiet moves. A stage is only generated when the caller gets that far, so callers that
+        stop early (any legal move? a cutoff?) skip the rest. The board may change while the
+        generator is suspended if it is restored before the next move is asked for."""
+        if hash_move is not None and self.is_valid_move(hash_move[0], hash_move[1], turn_color=color):
+            yield hash_move
+        for move in self.iter_captures(color):
+            if move != hash_move:
+                yield move
+        for move in self.iter_quiet_moves(color):
+            if move != hash_move:
+                yield move
+
+    def iter_captures(self, color):
+        """Moves of ``color`` onto an opponent piece, piece by piece."""
+        for start_pos in self._iter_squares(color):
+            for end_pos in sorted(self._piece_targets(start_pos, True)):
+                yield start_pos, end_pos
+
+    def iter_quiet_moves(self, color):
+        """Moves of ``color`` onto an empty square, piece by piece."""
+        for start_pos in self._iter_squares(color):
+            for end_pos in sorted(self._piece_targets(start_pos, False)):
+                yield start_pos, end_pos
+
+    def _iter_squares(self, color):
+        for square, _ in self.iter_pieces(color):
+            yield square
+
+    def _piece_targets(self, start_pos, captures):
+        """End squares is_valid_move accepts for the piece on ``start_pos``: captures or quiet moves only."""
+        board = self.board
+        row, col = start_pos
+        color, piece_type = board[row][col]
+        if piece_type == 'P':
+            direction = -1 if color == 'w' else 1
+            r = row + direction
+            if not 0 <= r < HEIGHT:
+                return
+            if captures:
+                for c in (col - 1, col + 1):
+                    if 0 <= c < WIDTH and board[r][c] is not None and board[r][c][0] != color:
+                        yield r, c
+            elif board[r][col] is None:
+                yield r, col
+                if row == (6 if color == 'w' else 1) and board[r + direction][col] is None:
+                    yield r + direction, col
+        elif piece_type in ('N', 'K'):
+            for dr, dc in KNIGHT_OFFSETS if piece_type == 'N' else KING_OFFSETS:
+                r, c = row + dr, col + dc
+                if 0 <= r < HEIGHT and 0 <= c < WIDTH:
+                    target = board[r][c]
+                    if target is None:
+                        if not captures:
+                            yield r, c
+                    elif captures and target[0] != color:
+                        yield r, c
+        else:
+            directions = {'R': ROOK_DIRECTIONS, 'B': BISHOP_DIRECTIONS, 'Q': KING_OFFSETS}[piece_type]
+            for dr, dc in directions:
+                r, c = row + dr, col + dc
+                while 0 <= r < HEIGHT and 0 <= c < WIDTH:
+                    target = board[r][c]
+                    if target is not None:
+                        if captures and target[0] != color:
+                            yield r, c
+                        break
+                    if not captures:
+                        yield r, c
+                    r += dr; c += dc
 
     # --- Add Check and Game Over Logic ---
     def find_king(self, color):
         """Finds the coordinates of the king of the specified color."""
-        king_char = color + 'K'
-        for r in range(HEIGHT):
-            for c in range(WIDTH):
-                if self.board[r][c] == king_char:
-                    return (r, c)
-        return None # Should not happen in a normal game
+        # The first one in board order if a FEN has several, None once it was captured (moves are pseudo-legal)
+        return min(self.piece_squares[color + 'K'], default=None)
 
     def is_square_attacked(self, row, col, attacker_color):
         """Checks if the given square is attacked by any piece of the attacker_color."""
@@ -287,21 +505,18 @@ class ChessGame:
         # Temporarily switch turn perspective for validation
         original_turn = self.current_turn
         self.current_turn = attacker_color
-        for r_start in range(HEIGHT):
-            for c_start in range(WIDTH):
-                piece = self.get_piece_at(r_start, c_start)
-                if piece and piece[0] == attacker_color:
-                    # Can the attacker piece move to the target square?
-                    # Need to handle pawn capture differently
-                    if piece[1] == 'P':
-                        direction = -1 if attacker_color == 'w' else 1
-                        if r_start + direction == row and abs(c_start - col) == 1:
-                             self.current_turn = original_turn # Restore turn
-                             return True # Pawn capture threat
-                    # Check standard move validation for other pieces
-                    elif self.is_valid_move((r_start, c_start), (row, col), turn_color=attacker_color):
-                        self.current_turn = original_turn # Restore turn
-                        return True
+        for (r_start, c_start), piece in self.iter_pieces(attacker_color):
+            # Can the attacker piece move to the target square?
+            # Need to handle pawn capture differently
+            if piece[1] == 'P':
+                direction = -1 if attacker_color == 'w' else 1
+                if r_start + direction == row and abs(c_start - col) == 1:
+                     self.current_turn = original_turn # Restore turn
+                     return True # Pawn capture threat
+            # Check standard move validation for other pieces
+            elif self.is_valid_move((r_start, c_start), (row, col), turn_color=attacker_color):
+                self.current_turn = original_turn # Restore turn
+                return True
         self.current_turn = original_turn # Restore turn
         return False
 
@@ -314,38 +529,113 @@ class ChessGame:
         return self.is_square_attacked(king_pos[0], king_pos[1], opponent_color)
 
     def check_game_over(self):
-        """Checks if the game has ended (checkmate or stalemate)."""
-        possible_moves = self.generate_all_valid_moves(self.current_turn)
+        """Checks if the game has ended (checkmate, stalemate, 50-move rule or threefold repetition)."""
+        # Only whether a move exists matters: stop at the first one
+        has_moves = next(self.iter_moves(self.current_turn), None) is not None
 
-        if not possible_moves:
+        self.draw_reason = None
+        if not has_moves:
             king_in_check = self.is_king_in_check(self.current_turn)
             if king_in_check:
                 self.winner = 'b' if self.current_turn == 'w' else 'w' # Opponent wins
                 print(f"Checkmate! {'Black' if self.winner == 'b' else 'White'} wins.")
             else:
                 self.winner = 'draw'
+                self.draw_reason = 'stalemate'
                 print("Stalemate! It's a draw.")
             self.game_over = True
+        elif self.halfmove_clock >= 100:
+            self.winner = 'draw'
+            self.draw_reason = '50-move rule'
+            self.game_over = True
+            print("50-move rule! It's a draw.")
+        elif self.is_repetition(3):
+            self.winner = 'draw'
+            self.draw_reason = 'repetition'
+            self.game_over = True
+            print("Threefold repetition! It's a draw.")
         else:
             self.game_over = False
             self.winner = None
 
-        # Add other draw conditions later (50-move rule, threefold repetition)
-
     # --- Keep AI methods ---
     def get_piece_value(self, piece):
         if piece is None: return 0
         return PIECE_VALUES.get(piece[1], 0)
 
+    def _exchange_attackers(self, row, col):
+        """Pieces that can capture on (row, col), in attack order: a list of rays (nearest piece
+        first, the ones behind it only attack once it is gone) and the knights."""
+        rays = []
+        for directions, sliders in ((ROOK_DIRECTIONS, 'RQ'), (BISHOP_DIRECTIONS, 'BQ')):
+            for dr, dc in directions:
+                ray = []
+                r, c = row + dr, col + dc
+                while 0 <= r < HEIGHT and 0 <= c < WIDTH:
+                    piece = self.board[r][c]
+                    if piece is not None:
+                        distance = max(abs(r - row), abs(c - col))
+                        attacks = (piece[1] in sliders
+                                   or (distance == 1 and piece[1] == 'K')
+                                   # A pawn attacks diagonally forward: white from the row below, black from above
+                                   or (distance == 1 and piece[1] == 'P' and sliders == 'BQ'
+                                       and dr == (1 if piece[0] == 'w' else -1)))
+                        ray.append(((r, c), piece if attacks else None)) # None: blocks without attacking
+                    r += dr; c += dc
+                if ray:
+                    rays.append(ray)
+        knights = [((row + dr, col + dc), self.board[row + dr][col + dc]) for dr, dc in KNIGHT_OFFSETS
+                   if 0 <= row + dr < HEIGHT and 0 <= col + dc < WIDTH and self.board[row + dr][col + dc] is not None
+                   and self.board[row + dr][col + dc][1] == 'N']
+        return rays, knights
+
+    def static_exchange(self, start_pos, end_pos):
+        """Material won by the mover (in PIECE_VALUES) if both sides keep recapturing on end_pos
+        with their least valuable attacker and either may stop; no move is made."""
+        row, col = end_pos
+        rays, knights = self._exchange_attackers(row, col)
+        # The first mover leaves its ray or the knight list
+        for ray in rays:
+            if ray[0][0] == start_pos:
+                ray.pop(0)
+        knights = [knight for knight in knights if knight[0] != start_pos]
+
+        gains = [self.get_piece_value(self.board[row][col])]
+        on_square = self.get_piece_value(self.board[start_pos[0]][start_pos[1]])
+        side = 'b' if self.board[start_pos[0]][start_pos[1]][0] == 'w' else 'w'
+        while True:
+            # Least valuable attacker of `side`: a ray front or a knight
+            best_value, best_ray, best_knight = None, None, None
+            for ray in rays:
+                if ray and ray[0][1] is not None and ray[0][1][0] == side:
+                    value = self.get_piece_value(ray[0][1])
+                    if best_value is None or value < best_value:
+                        best_value, best_ray = value, ray
+            for knight in knights:
+                if knight[1][0] == side and (best_value is None or PIECE_VALUES['N'] < best_value):
+                    best_value, best_ray, best_knight = PIECE_VALUES['N'], None, knight
+            if best_value is None:
+                break
+            gains.append(on_square - gains[-1])
+            on_square = best_value
+            if best_knight is not None:
+                knights.remove(best_knight)
+            else:
+                best_ray.pop(0) # Uncovers the x-ray attacker behind it, if any
+            side = 'b' if side == 'w' else 'w'
+        # Either side may decline to recapture: fold the sequence from the end
+        for i in range(len(gains) - 1, 0, -1):
+            gains[i - 1] = -max(-gains[i - 1], gains[i])
+        return gains[0]
+
     def evaluate_board(self):
         score = 0
-        for r in range(HEIGHT):
-            for c in range(WIDTH):
-                piece = self.get_piece_at(r, c)
-                if piece:
-                    value = self.get_piece_value(piece)
-                    if piece[0] == 'w': score += value
-                    else: score -= value
+        # Material only: the piece index gives the counts without looking at the squares
+        for piece, squares in self.piece_squares.items():
+            if squares:
+                value = self.get_piece_value(piece) * len(squares)
+                if piece[0] == 'w': score += value
+                else: score -= value
         # Add positional scoring later if desired
         return score
 
@@ -359,6 +649,8 @@ class ChessGame:
             move = self.get_ai_move_level_1()
         elif self.ai_difficulty == 2:
             move = self.get_ai_move_level_2()
+        elif self.ai_difficulty == 3:
+            move = self.get_ai_move_level_3()
         else:
             move = None
         print("AI finished thinking.")
@@ -376,15 +668,18 @@ class ChessGame:
         for move in valid_moves:
             target_piece = self.get_piece_at(move[1][0], move[1][1])
             if target_piece is not None:
-                capture_value = self.get_piece_value(target_piece)
+                # Score the whole exchange, not just the captured piece
+                capture_value = self.static_exchange(move[0], move[1])
                 capture_moves.append((capture_value, move))
         if capture_moves:
             capture_moves.sort(key=lambda x: x[0], reverse=True)
             best_value = capture_moves[0][0]
-            best_captures = [m[1] for m in capture_moves if m[0] == best_value]
-            return random.choice(best_captures)
-        else:
-            return random.choice(valid_moves)
+            if best_value >= 0:
+                best_captures = [m[1] for m in capture_moves if m[0] == best_value]
+                return random.choice(best_captures)
+        # Only losing captures: play any other move
+        losing_captures = [m[1] for m in capture_moves]
+        return random.choice([m for m in valid_moves if m not in losing_captures] or valid_moves)
 
     def get_ai_move_level_2(self):
         depth = 2 # Adjust depth for performance vs strength trade-off
@@ -409,7 +704,7 @@ class ChessGame:
             if moved_p is None: continue # Should not happen
 
             # Call minimax for the opponent's turn
-            board_value = self.minimax(depth - 1, not is_maximizing) # Flip maximizing player
+            board_value = self.minimax(depth - 1, not is_maximizing, len(self.position_history) - 1) # Flip maximizing player
 
             # Undo the move
             self.undo_move()
@@ -431,8 +726,27 @@ class ChessGame:
 
         return best_move
 
+    def get_ai_move_level_3(self):
+        """Iterative deepening alpha-beta search for AI_MOVE_TIME seconds."""
+        from search import SearchLimits
+        self.last_search = self.searcher.search(self, SearchLimits(movetime=AI_MOVE_TIME))
+        return self.last_search.move if self.last_search else None
 
-    def minimax(self, depth, is_maximizing_player):
+    def predicted_reply(self):
+        """Opponent reply expected by the last level 3 search, if it is still the next move."""
+        if self.last_search is None or len(self.last_search.pv) < 2:
+            return None
+        if not self.move_log or self.move_log[-1][:2] != self.last_search.pv[0]:
+            return None
+        return self.last_search.pv[1]
+
+    def minimax(self, depth, is_maximizing_player, search_root=None):
+        # A position repeated inside the search line is scored as a draw, the side that can avoid it will;
+        # one only seen before the search (search_root: len(position_history) at the root) needs threefold
+        if search_root is None:
+            search_root = len(self.position_history)
+        if self.is_repetition(3, search_root):
+            return 0
         if depth == 0 or self.game_over: # Check game_over in recursion too
             # Return large values for checkmate immediately
             if self.game_over:
@@ -461,6 +775,7 @@ class ChessGame:
             # Reset game over state and turn for the simulation
             self.game_over = False
             self.winner = None
+            self.draw_reason = None
             self.current_turn = original_turn
             return eval_score
 
@@ -470,7 +785,7 @@ class ChessGame:
             for move in possible_moves:
                 moved_p, captured_p = self.make_move(move[0], move[1])
                 if moved_p is None: continue
-                eval_score = self.minimax(depth - 1, False) # Go to minimizing player
+                eval_score = self.minimax(depth - 1, False, search_root) # Go to minimizing player
                 self.undo_move()
                 max_eval = max(max_eval, eval_score)
             return max_eval
@@ -479,7 +794,7 @@ class ChessGame:
             for move in possible_moves:
                 moved_p, captured_p = self.make_move(move[0], move[1])
                 if moved_p is None: continue
-                eval_score = self.minimax(depth - 1, True) # Go to maximizing player
+                eval_score = self.minimax(depth - 1, True, search_root) # Go to maximizing player
                 self.undo_move()
                 min_eval = min(min_eval, eval_score)
             return min_eval
@@ -491,18 +806,20 @@ class ChessGame:
 def load_piece_images():
     """Loads images from the 'images' folder."""
     pieces = ['wP', 'wR', 'wN', 'wB', 'wK', 'wQ', 'bP', 'bR', 'bN', 'bB', 'bK', 'bQ']
-    for piece in pieces:
-        try:
-            img_path = f"images/{piece}.png" # Assumes 'images' subfolder
-            IMAGES[piece] = pygame.transform.scale(pygame.image.load(img_path), (SQ_SIZE, SQ_SIZE))
-        except pygame.error as e:
-            print(f"Error loading image: {img_path}")
-            print(e)
-            sys.exit()
-        except FileNotFoundError:
-             print(f"Error: Image file not found at {img_path}")
-             print("Please ensure you have an 'images' folder with files like wP.png, bK.png, etc.")
-             sys.exit()
+    img_paths = {piece: f"images/{piece}.png" for piece in pieces} # Assumes 'images' subfolder
+    try:
+        # Scaled sprites come from a cached bundle after the first run
+        sprites = load_sprites(img_paths.values(), SQ_SIZE)
+    except pygame.error as e:
+        print("Error loading images")
+        print(e)
+        sys.exit()
+    except FileNotFoundError as e:
+         print(f"Error: Image file not found at {e.filename}")
+         print("Please ensure you have an 'images' folder with files like wP.png, bK.png, etc.")
+         sys.exit()
+    for piece, img_path in img_paths.items():
+        IMAGES[piece] = sprites[img_path]
 
 
 def draw_board(screen):
@@ -552,11 +869,26 @@ def draw_game_state(screen, game):
     # draw_highlights(screen, selected_square, current_valid_moves)
 
 
-def draw_game_over_message(screen, winner):
+def draw_history_slider(screen, ply, total):
+    """Draws the move history bar: the filled part is the shown ply, out of all the plies played."""
+    bar = pygame.Rect(0, BOARD_HEIGHT, BOARD_WIDTH, SLIDER_HEIGHT)
+    pygame.draw.rect(screen, SLIDER_COLOR, bar)
+    if total:
+        pygame.draw.rect(screen, SLIDER_FILL_COLOR, pygame.Rect(0, BOARD_HEIGHT, BOARD_WIDTH * ply // total, SLIDER_HEIGHT))
+    text = get_font('Arial', 16).render(f"{ply} / {total}", True, pygame.Color('White'))
+    screen.blit(text, (BOARD_WIDTH - text.get_width() - 6, BOARD_HEIGHT + (SLIDER_HEIGHT - text.get_height()) // 2))
+
+
+def slider_ply(x, total):
+    """Ply under the x position of a click on the slider."""
+    return max(0, min(total, round(x * total / BOARD_WIDTH)))
+
+
+def draw_game_over_message(screen, winner, draw_reason=None):
     """Displays the game over message."""
-    font = pygame.font.SysFont('Arial', 48, True, False)
+    font = get_font('Arial', 48, bold=True)
     if winner == 'draw':
-        text = "Stalemate! It's a Draw!"
+        text = DRAW_MESSAGES.get(draw_reason, "It's a Draw!")
     elif winner == 'w':
         text = "Checkmate! White Wins!"
     elif winner == 'b':
@@ -575,23 +907,64 @@ def draw_game_over_message(screen, winner):
     screen.blit(text_object, text_location)
 
 
+class MateSearch:
+    """'m' key: the mate solver runs on a copy of the game in a background thread, so the window
+    keeps drawing. Its result only applies if the game is still in the position it started from."""
+
+    def __init__(self, game):
+        import threading
+        from mate_solver import MateSolver
+        self.plies = len(game.move_log)
+        self.position_hash = game.position_hash
+        self.solver = MateSolver()
+        self.result = None
+        self.cancelled = False
+        self._thread = threading.Thread(target=self._run, args=(game.copy(),), daemon=True)
+        self._thread.start()
+
+    def _run(self, position):
+        from search import SearchLimits
+        result = self.solver.solve(position, SearchLimits(depth=MATE_SOLVER_MOVES, movetime=MATE_SOLVER_TIME))
+        if not self.cancelled:
+            self.result = result
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        self.cancelled = True
+        self.solver.stop() # Checked at every node, also if the thread has not started solving yet
+
+    def matches(self, game):
+        return len(game.move_log) == self.plies and game.position_hash == self.position_hash
+
+
 # --- Main Game Loop ---
 
 def main():
+    from analysis_cache import AnalysisCache
+    from frame_profiler import FrameProfiler
+    from move_history import MoveHistory
+    from search import Ponderer, SearchLimits
+
     # --- AI Setup ---
     ai_level = None
+    ponder = False
     while True:
         try:
             choice = input("Play against AI? (y/n): ").strip().lower()
             if choice == 'y':
-                level_str = input("Enter AI difficulty (0=Easy, 1=Medium, 2=Harder): ").strip()
+                level_str = input("Enter AI difficulty (0=Easy, 1=Medium, 2=Harder, 3=Search): ").strip()
                 level = int(level_str)
-                if level in [0, 1, 2]:
+                if level in [0, 1, 2, 3]:
                     ai_level = level
+                    if level == 3:
+                        ponder = input("Let the AI think during your turn (pondering)? (y/n): ").strip().lower() == 'y'
                     print(f"Starting game against AI Level {ai_level}.")
                     break
                 else:
-                    print("Invalid level. Choose 0, 1, or 2.")
+                    print("Invalid level. Choose 0, 1, 2 or 3.")
             elif choice == 'n':
                 ai_level = None
                 print("Starting Player vs Player game.")
@@ -612,23 +985,43 @@ def main():
     load_piece_images() # Load images into the global IMAGES dict
 
     # --- Game State Initialization ---
-    game = ChessGame(ai_difficulty=ai_level)
+    analysis_cache = AnalysisCache(ANALYSIS_CACHE_PATH) if ai_level == 3 else None
+    game = ChessGame(ai_difficulty=ai_level, analysis_cache=analysis_cache)
+    ponderer = Ponderer(game.searcher) if ponder else None
+    profiler = FrameProfiler() # F3: frame time HUD, F4: export, F5: cProfile
     running = True
     selected_square = None  # Store the (row, col) of the selected piece
     player_clicks = []      # Store sequence of clicks: [start_sq, end_sq]
     current_valid_moves = [] # Store valid moves for the selected piece
+    history = MoveHistory.for_game(game)
+    view_ply = None # Ply shown while browsing the history, None for the live position
+    mate_search = None # Running 'm' key search, if any
 
     # --- Game Loop ---
     while running:
         is_human_turn = (game.ai_difficulty is None or game.current_turn == 'w')
+        history.sync(game.move_log)
 
+        profiler.start_frame()
+        profiler.begin('events')
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-            # --- Mouse Click Handling (Only if Human Turn and Game Not Over) ---
-            elif event.type == pygame.MOUSEBUTTONDOWN and is_human_turn and not game.game_over:
+                if ponderer is not None:
+                    ponderer.stop()
+
+            # --- History slider: click or drag to show any ply ---
+            elif (event.type == pygame.MOUSEBUTTONDOWN or (event.type == pygame.MOUSEMOTION and event.buttons[0])) \
+                    and event.pos[1] >= BOARD_HEIGHT:
+                profiler.mark_input()
+                view_ply = slider_ply(event.pos[0], len(history))
+                if view_ply == len(history):
+                    view_ply = None
+
+            # --- Mouse Click Handling (Only if Human Turn, Game Not Over and showing the live position) ---
+            elif event.type == pygame.MOUSEBUTTONDOWN and is_human_turn and not game.game_over and view_ply is None:
                 location = pygame.mouse.get_pos()  # (x, y) location of the mouse click
+                profiler.mark_input()
                 col = location[0] // SQ_SIZE
                 row = location[1] // SQ_SIZE
 
@@ -649,7 +1042,8 @@ def main():
                         selected_square = clicked_square
                         player_clicks.append(selected_square)
                         # Generate and store valid moves for highlighting
-                        current_valid_moves = game.generate_all_valid_moves(game.current_turn)
+                        with profiler.phase('rules'):
+                            current_valid_moves = game.generate_all_valid_moves(game.current_turn)
                         # Filter moves starting from the selected square
                         current_valid_moves = [m for m in current_valid_moves if m[0] == selected_square]
                         print(f"Selected {clicked_piece} at {game._coords_to_algebraic(selected_square)}. Valid moves: {[game._coords_to_algebraic(m[1]) for m in current_valid_moves]}") # Debug
@@ -675,7 +1069,8 @@ def main():
                     if is_a_valid_target:
                         print(f"Attempting move: {game._coords_to_algebraic(start_pos)} to {game._coords_to_algebraic(end_pos)}") # Debug
                         # Make the move using the game logic
-                        moved_p, captured_p = game.make_move(move_tuple[0], move_tuple[1])
+                        with profiler.phase('rules'): # make_move checks for the game end
+                            moved_p, captured_p = game.make_move(move_tuple[0], move_tuple[1])
                         if moved_p: # Move was successful
                             print(f"Move successful. Captured: {captured_p}") # Debug
                             selected_square = None # Reset selection
@@ -696,7 +1091,8 @@ def main():
                              selected_square = clicked_square
                              player_clicks = [selected_square] # Reset clicks to just the new one
                              # Regenerate valid moves for the new piece
-                             current_valid_moves = game.generate_all_valid_moves(game.current_turn)
+                             with profiler.phase('rules'):
+                                 current_valid_moves = game.generate_all_valid_moves(game.current_turn)
                              current_valid_moves = [m for m in current_valid_moves if m[0] == selected_square]
                              print(f"Changed selection to {clicked_piece} at {game._coords_to_algebraic(selected_square)}. Valid moves: {[game._coords_to_algebraic(m[1]) for m in current_valid_moves]}") # Debug
                         else: # Clicked empty square or opponent piece invalidly -> Deselect
@@ -707,7 +1103,16 @@ def main():
 
             # --- Key Press Handling (Optional: e.g., 'u' to undo) ---
             elif event.type == pygame.KEYDOWN:
-                 if event.key == pygame.K_u:
+                 profiler.handle_key(event.key)
+                 # Browse the history: arrows step one ply, Home/End jump to the start/the live position
+                 if event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_HOME, pygame.K_END):
+                     shown = len(history) if view_ply is None else view_ply
+                     shown = {pygame.K_LEFT: shown - 1, pygame.K_RIGHT: shown + 1,
+                              pygame.K_HOME: 0, pygame.K_END: len(history)}[event.key]
+                     view_ply = max(0, shown) if shown < len(history) else None
+                 elif event.key == pygame.K_u:
+                     if ponderer is not None:
+                         ponderer.stop()
                      if game.undo_move():
                          print("Move undone.")
                          # If AI was playing, might need to undo twice to get back to human turn
@@ -717,40 +1122,103 @@ def main():
                          selected_square = None # Reset UI state
                          player_clicks = []
                          current_valid_moves = []
+                         view_ply = None
                          game.game_over = False # Ensure game over state is reset
                          game.winner = None
                      else:
                          print("Cannot undo.")
+                 elif event.key == pygame.K_m and not game.game_over and mate_search is None: # 'm' to look for a forced mate
+                      print(f"Looking for a mate in up to {MATE_SOLVER_MOVES} moves...")
+                      pygame.display.set_caption('Simple Pygame Chess - looking for a mate...')
+                      mate_search = MateSearch(game)
                  elif event.key == pygame.K_r: # 'r' to reset game
                       print("Resetting game...")
+                      if ponderer is not None:
+                          ponderer.stop()
+                      if mate_search is not None:
+                          mate_search.cancel()
                       main() # Restart the main function
                       return # Exit the current instance
 
 
+        profiler.end()
+
+        # --- Mate search result ---
+        if mate_search is not None and mate_search.done:
+            result = mate_search.result
+            pygame.display.set_caption('Simple Pygame Chess')
+            if result is None: # The solver thread failed
+                print("Mate search failed.")
+            elif not mate_search.matches(game):
+                print("Mate search ignored: the position changed.")
+            elif result.mate_in and result.line:
+                line = ' '.join(game._coords_to_algebraic(m[0]) + game._coords_to_algebraic(m[1]) for m in result.line)
+                print(f"Mate in {result.mate_in}: {line} ({result.nodes} nodes, {result.elapsed:.2f}s)")
+                if is_human_turn and view_ply is None:
+                    # Select the first mating move, one click on its target plays it
+                    selected_square = result.line[0][0]
+                    player_clicks = [selected_square]
+                    current_valid_moves = [result.line[0]]
+            elif result.mate_in:
+                print(f"Mate in {result.mate_in} ({result.nodes} nodes, {result.elapsed:.2f}s).")
+            elif result.complete:
+                print(f"No mate in {MATE_SOLVER_MOVES} moves ({result.nodes} nodes, {result.elapsed:.2f}s).")
+            else:
+                print(f"No mate found in {MATE_SOLVER_TIME:.0f}s ({result.nodes} nodes).")
+            mate_search = None
+
         # --- AI Turn Logic ---
         if not is_human_turn and not game.game_over:
-            ai_move = game.get_ai_move()
+            profiler.begin('ai')
+            ai_move = None
+            if ponderer is not None and ponderer.active:
+                if game.move_log and game.move_log[-1][:2] == ponderer.predicted_move:
+                    # Ponder hit: the background search already covers this position
+                    game.last_search = ponderer.hit()
+                    ai_move = game.last_search.move if game.last_search else None
+                    print("Ponder hit.")
+                else:
+                    ponderer.stop()
+            if ai_move is None:
+                ai_move = game.get_ai_move()
             if ai_move:
                 print(f"AI chooses move: {game._coords_to_algebraic(ai_move[0])} to {game._coords_to_algebraic(ai_move[1])}")
                 moved_p, captured_p = game.make_move(ai_move[0], ai_move[1])
                 # AI move done, turn switched in make_move
+                predicted = game.predicted_reply()
+                if ponderer is not None and predicted and not game.game_over:
+                    ponderer.start(game, predicted, SearchLimits(movetime=AI_MOVE_TIME))
             else:
                  # Should be handled by check_game_over, but log if AI fails to move
                  print("AI could not find a move (Game should be over?).")
                  game.check_game_over() # Double check
+            profiler.end()
 
 
         # --- Drawing ---
-        draw_game_state(screen, game) # Draw board and pieces first
-        # Draw highlights based on current selection state
-        draw_highlights(screen, selected_square, current_valid_moves)
+        profiler.begin('draw')
+        history.sync(game.move_log)
+        if view_ply is not None:
+            # Browsing: past position only, no selection or game over overlay
+            draw_board(screen)
+            draw_pieces(screen, history.board_at(view_ply))
+            draw_history_slider(screen, view_ply, len(history))
+        else:
+            draw_game_state(screen, game) # Draw board and pieces first
+            # Draw highlights based on current selection state
+            draw_highlights(screen, selected_square, current_valid_moves)
+            draw_history_slider(screen, len(history), len(history))
 
-        # Draw game over message if applicable
-        if game.game_over:
-            draw_game_over_message(screen, game.winner)
+            # Draw game over message if applicable
+            if game.game_over:
+                draw_game_over_message(screen, game.winner, game.draw_reason)
+        profiler.draw_hud(screen)
+        profiler.end()
 
         # --- Update Display ---
-        pygame.display.flip()
+        with profiler.phase('flip'):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(30)  # Limit frame rate
 
     pygame.quit()
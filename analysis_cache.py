@@ -0,0 +1,163 @@
+"""Persistent analysis cache: level 3 search results kept on disk between runs.
+
+Entries are keyed by ``position_hash`` and hold the depth, score and best
+move of a finished search. The store is a SQLite database in WAL mode, so the
+GUI, the server's engine processes and batch jobs can read and write the same
+file at once (on a local disk: WAL needs shared memory); writers wait up to
+``timeout`` seconds for each other. A position keeps its deepest result.
+Past ``max_entries`` positions, the least recently used ones are deleted.
+A hit only notes its time in memory: the times are written in one batch with
+the periodic size check (and on close), so reads stay read-only.
+
+    cache = AnalysisCache('analysis.sqlite3')
+    searcher = Searcher(cache=cache)        # looks the root up first, stores deep results
+    cache.get(game.position_hash)           # CacheEntry(depth, score, move) or None
+
+    python analysis_cache.py analysis.sqlite3 [--clear]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+from game_archive import decode_move, encode_move
+
+DEFAULT_PATH = 'analysis.sqlite3'
+DEFAULT_MAX_ENTRIES = 1_000_000
+DEFAULT_MIN_DEPTH = 4 # Shallower results are cheaper to search again than to store
+DEFAULT_TIMEOUT = 30.0 # Seconds to wait for another process's write
+EVICT_INTERVAL = 256 # Puts between two size checks
+EVICT_SLACK = 0.1 # An eviction goes this fraction below max_entries, so it does not run on every put
+
+CacheEntry = namedtuple('CacheEntry', ['depth', 'score', 'move'])
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS analysis (
+    key INTEGER PRIMARY KEY, -- position hash, as a signed 64-bit integer
+    depth INTEGER NOT NULL,
+    score REAL NOT NULL, -- pawns, for the side to move
+    move INTEGER NOT NULL, -- game_archive.encode_move
+    used REAL NOT NULL -- time of the last get or put
+);
+CREATE INDEX IF NOT EXISTS analysis_used ON analysis (used);
+'''
+
+
+def _key(position_hash):
+    return position_hash - (1 << 64) if position_hash >= 1 << 63 else position_hash
+
+
+class AnalysisCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES, min_depth=DEFAULT_MIN_DEPTH,
+                 timeout=DEFAULT_TIMEOUT):
+        self.path = path
+        self.max_entries = max_entries
+        self.min_depth = min_depth # Searcher only stores results at least this deep
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._touched = {} # key -> time of its last hit, not yet written
+        self._db = None
+        self._pid = None
+        self._lock = threading.Lock() # The connection is shared with the pondering thread
+
+    def _connection(self):
+        # A connection must not cross a fork: every process opens its own
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                       check_same_thread=False)
+            self._touched = {} # The parent process writes its own
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL') # A crash may lose the last writes, never corrupt
+            self._db.executescript(SCHEMA)
+            self._pid = os.getpid()
+        return self._db
+
+    def get(self, position_hash):
+        key = _key(position_hash)
+        with self._lock:
+            db = self._connection()
+            row = db.execute('SELECT depth, score, move FROM analysis WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            self.hits += 1
+        depth, score, move = row
+        start, end, _ = decode_move(move)
+        return CacheEntry(depth, score, (start, end))
+
+    def put(self, position_hash, depth, score, move):
+        """Stores a search result, unless the position already has a deeper one."""
+        with self._lock:
+            db = self._connection()
+            db.execute('INSERT INTO analysis VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                       'depth = excluded.depth, score = excluded.score, move = excluded.move, used = excluded.used '
+                       'WHERE excluded.depth >= analysis.depth',
+                       (_key(position_hash), depth, score, encode_move(*move), time.time()))
+            self._puts += 1
+            if self._puts % EVICT_INTERVAL == 0:
+                self._evict(db)
+
+    def _evict(self, db):
+        # One transaction, so two processes evicting at once do not both delete
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            self._write_touched(db) # First, so the positions just used are kept
+            count = db.execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+            if count > self.max_entries:
+                db.execute('DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY used LIMIT ?)',
+                           (count - int(self.max_entries * (1 - EVICT_SLACK)),))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def _write_touched(self, db):
+        # MAX: a put since the hit already wrote a later time
+        db.executemany('UPDATE analysis SET used = MAX(used, ?) WHERE key = ?',
+                       [(used, key) for key, used in self._touched.items()])
+        self._touched.clear()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute('DELETE FROM analysis')
+
+    def stats(self):
+        with self._lock:
+            depths = Counter(dict(self._connection().execute('SELECT depth, COUNT(*) FROM analysis GROUP BY depth')))
+        return {'path': self.path, 'entries': sum(depths.values()), 'max_entries': self.max_entries,
+                'bytes': os.path.getsize(self.path), 'depths': dict(sorted(depths.items())),
+                'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                if self._touched:
+                    self._write_touched(self._db)
+                self._db.close()
+            self._db = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show or clear an analysis cache.')
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    parser.add_argument('--clear', action='store_true', help='delete every entry')
+    args = parser.parse_args(argv)
+    cache = AnalysisCache(args.path)
+    if args.clear:
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
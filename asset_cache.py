@@ -0,0 +1,134 @@
+"""Startup caches: pre-scaled sprite bundles and resolved font files.
+
+``load_sprites`` decodes and rescales the piece PNGs once per square size and
+stores the raw RGBA pixels in ``.asset_cache/sprites_<size>.bin``; later runs
+read that bundle in one go. The bundle is rebuilt when a source image changes.
+
+``get_font`` replaces ``pygame.font.SysFont``, which scans every system font:
+the scan runs in a background thread and the file it resolves to is
+remembered in ``.asset_cache/fonts.json``. Until then (the first run) text
+uses pygame's bundled default font.
+"""
+import json
+import os
+import struct
+import threading
+
+import pygame
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.asset_cache')
+BUNDLE_MAGIC = b'CHSP'
+BUNDLE_HEADER = struct.Struct('<4sI')    # magic, JSON metadata length
+FONT_FILE = os.path.join(CACHE_DIR, 'fonts.json')
+
+_fonts = {}
+_font_lock = threading.Lock() # fonts.json is written by the lookup threads
+_font_lookups = set()
+
+
+def _sources(paths):
+    return [[path, os.stat(path).st_mtime_ns, os.stat(path).st_size] for path in paths]
+
+
+def _write_atomic(path, data):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_bundle(path, sources, size):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < BUNDLE_HEADER.size:
+        return None
+    magic, meta_length = BUNDLE_HEADER.unpack_from(data)
+    if magic != BUNDLE_MAGIC:
+        return None
+    try:
+        meta = json.loads(data[BUNDLE_HEADER.size:BUNDLE_HEADER.size + meta_length])
+        if meta['sources'] != sources or meta['size'] != size:
+            return None
+        paths = list(meta['paths'])
+    except (ValueError, KeyError, TypeError): # Corrupt bundle: rebuilt like a stale one
+        return None
+    offset = BUNDLE_HEADER.size + meta_length
+    stride = size * size * 4
+    if len(data) != offset + stride * len(paths):
+        return None
+    view = memoryview(data)
+    sprites = {}
+    for path in paths:
+        # frombuffer keeps a reference to `data`, no copy is made
+        sprites[path] = pygame.image.frombuffer(view[offset:offset + stride], (size, size), 'RGBA')
+        offset += stride
+    return sprites
+
+
+def _write_bundle(path, sources, size, sprites):
+    meta = json.dumps({'size': size, 'sources': sources, 'paths': list(sprites)}).encode()
+    pixels = b''.join(pygame.image.tobytes(sprite, 'RGBA') for sprite in sprites.values())
+    _write_atomic(path, BUNDLE_HEADER.pack(BUNDLE_MAGIC, len(meta)) + meta + pixels)
+
+
+def load_sprites(paths, size):
+    """Returns {path: Surface} scaled to size x size, from the bundle when it is up to date."""
+    paths = sorted(set(paths))
+    sources = _sources(paths)
+    bundle = os.path.join(CACHE_DIR, f'sprites_{size}.bin')
+    sprites = _read_bundle(bundle, sources, size)
+    if sprites is None:
+        sprites = {path: pygame.transform.scale(pygame.image.load(path), (size, size)) for path in paths}
+        try:
+            _write_bundle(bundle, sources, size, sprites)
+        except OSError as e:
+            print(f"Could not write sprite cache {bundle}: {e}")
+    return sprites
+
+
+def _font_paths():
+    try:
+        with open(FONT_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _look_up_font(entry, name, bold):
+    path = pygame.font.match_font(name, bold) or '' # '' is pygame's default font
+    with _font_lock:
+        paths = _font_paths()
+        paths[entry] = path
+        try:
+            _write_atomic(FONT_FILE, json.dumps(paths).encode())
+        except OSError:
+            pass
+
+
+def get_font(name, size, bold=False):
+    """Like pygame.font.SysFont, without the system font scan: a font not in fonts.json yet is
+    looked up in the background and pygame's default font is used for this run."""
+    key = (name, size, bold)
+    if key in _fonts:
+        return _fonts[key]
+    if not pygame.font.get_init():
+        pygame.font.init()
+    entry = f"{name}|{int(bold)}"
+    with _font_lock:
+        path = _font_paths().get(entry)
+    if path and not os.path.exists(path):
+        path = None # Font uninstalled since it was cached
+    if path is None:
+        if entry not in _font_lookups:
+            _font_lookups.add(entry)
+            threading.Thread(target=_look_up_font, args=(entry, name, bold), daemon=True).start()
+        path = ''
+    font = pygame.font.Font(path or None, size)
+    if bold and not path:
+        font.set_bold(True)
+    _fonts[key] = font
+    return font
@@ -0,0 +1,151 @@
+"""Vectorised evaluation of many ``ChessGame`` positions at once.
+
+Positions are packed into a ``(N, 12, 8, 8)`` uint8 plane tensor, one plane per
+piece (see PLANE_PIECES), using the ``ChessGame`` orientation (row 0 is rank 8).
+Scores are from White's point of view, like ``ChessGame.evaluate_board``:
+
+    planes = pack_fens(fens)                 # or pack_boards([game.board, ...])
+    material, positional = evaluate_batch(planes)
+
+``material`` matches ``evaluate_board`` exactly; ``positional`` adds the
+piece-square tables below, in pawns.
+"""
+from itertools import chain
+
+import numpy as np
+
+from game_loader import load_chess_game
+
+PLANE_PIECES = ['wP', 'wN', 'wB', 'wR', 'wQ', 'wK', 'bP', 'bN', 'bB', 'bR', 'bQ', 'bK']
+PIECE_CODES = {piece: index + 1 for index, piece in enumerate(PLANE_PIECES)}  # 0 is an empty square
+SQUARE_CODES = {None: 0, **PIECE_CODES}
+FEN_CODES = {(piece[1] if piece[0] == 'w' else piece[1].lower()): code for piece, code in PIECE_CODES.items()}
+# bytes.translate table from FEN placement characters (digits already expanded) to square codes
+_FEN_TABLE = bytes(FEN_CODES.get(chr(byte), 0) for byte in range(256))
+_FEN_SQUARES = set(FEN_CODES) | {'1'}
+
+# Piece-square tables for White, in centipawns, row 0 = rank 8
+PIECE_SQUARE_TABLES = {
+    'P': [[0, 0, 0, 0, 0, 0, 0, 0],
+          [50, 50, 50, 50, 50, 50, 50, 50],
+          [10, 10, 20, 30, 30, 20, 10, 10],
+          [5, 5, 10, 25, 25, 10, 5, 5],
+          [0, 0, 0, 20, 20, 0, 0, 0],
+          [5, -5, -10, 0, 0, -10, -5, 5],
+          [5, 10, 10, -20, -20, 10, 10, 5],
+          [0, 0, 0, 0, 0, 0, 0, 0]],
+    'N': [[-50, -40, -30, -30, -30, -30, -40, -50],
+          [-40, -20, 0, 0, 0, 0, -20, -40],
+          [-30, 0, 10, 15, 15, 10, 0, -30],
+          [-30, 5, 15, 20, 20, 15, 5, -30],
+          [-30, 0, 15, 20, 20, 15, 0, -30],
+          [-30, 5, 10, 15, 15, 10, 5, -30],
+          [-40, -20, 0, 5, 5, 0, -20, -40],
+          [-50, -40, -30, -30, -30, -30, -40, -50]],
+    'B': [[-20, -10, -10, -10, -10, -10, -10, -20],
+          [-10, 0, 0, 0, 0, 0, 0, -10],
+          [-10, 0, 5, 10, 10, 5, 0, -10],
+          [-10, 5, 5, 10, 10, 5, 5, -10],
+          [-10, 0, 10, 10, 10, 10, 0, -10],
+          [-10, 10, 10, 10, 10, 10, 10, -10],
+          [-10, 5, 0, 0, 0, 0, 5, -10],
+          [-20, -10, -10, -10, -10, -10, -10, -20]],
+    'R': [[0, 0, 0, 0, 0, 0, 0, 0],
+          [5, 10, 10, 10, 10, 10, 10, 5],
+          [-5, 0, 0, 0, 0, 0, 0, -5],
+          [-5, 0, 0, 0, 0, 0, 0, -5],
+          [-5, 0, 0, 0, 0, 0, 0, -5],
+          [-5, 0, 0, 0, 0, 0, 0, -5],
+          [-5, 0, 0, 0, 0, 0, 0, -5],
+          [0, 0, 0, 5, 5, 0, 0, 0]],
+    'Q': [[-20, -10, -10, -5, -5, -10, -10, -20],
+          [-10, 0, 0, 0, 0, 0, 0, -10],
+          [-10, 0, 5, 5, 5, 5, 0, -10],
+          [-5, 0, 5, 5, 5, 5, 0, -5],
+          [0, 0, 5, 5, 5, 5, 0, -5],
+          [-10, 5, 5, 5, 5, 5, 0, -10],
+          [-10, 0, 5, 0, 0, 0, 0, -10],
+          [-20, -10, -10, -5, -5, -10, -10, -20]],
+    'K': [[-30, -40, -40, -50, -50, -40, -40, -30],
+          [-30, -40, -40, -50, -50, -40, -40, -30],
+          [-30, -40, -40, -50, -50, -40, -40, -30],
+          [-30, -40, -40, -50, -50, -40, -40, -30],
+          [-20, -30, -30, -40, -40, -30, -30, -20],
+          [-10, -20, -20, -20, -20, -20, -20, -10],
+          [20, 20, 0, 0, 0, 0, 20, 20],
+          [20, 30, 10, 0, 0, 10, 30, 20]],
+}
+
+
+def _build_weights():
+    piece_values = load_chess_game().PIECE_VALUES
+    material = np.zeros(len(PLANE_PIECES), dtype=np.float64)
+    positional = np.zeros((len(PLANE_PIECES), 8, 8), dtype=np.float64)
+    for index, piece in enumerate(PLANE_PIECES):
+        sign = 1 if piece[0] == 'w' else -1
+        table = np.array(PIECE_SQUARE_TABLES[piece[1]], dtype=np.float64) / 100
+        material[index] = sign * piece_values[piece[1]]
+        # Black uses White's table mirrored vertically
+        positional[index] = sign * (table if piece[0] == 'w' else table[::-1])
+    return material, positional
+
+
+MATERIAL_WEIGHTS, POSITIONAL_WEIGHTS = _build_weights()
+
+
+def codes_to_planes(codes):
+    """(N, 64) square codes (0 empty, 1..12 PLANE_PIECES) to a (N, 12, 8, 8) uint8 tensor."""
+    codes = np.asarray(codes, dtype=np.uint8).reshape(-1, 64)
+    planes = codes[:, None, :] == np.arange(1, 13, dtype=np.uint8)[None, :, None]
+    return planes.reshape(-1, 12, 8, 8).view(np.uint8)
+
+
+def board_codes(boards):
+    """(N, 64) uint8 square codes for ``ChessGame.board`` lists (8x8 of 'wP'-style strings or None)."""
+    squares = chain.from_iterable(chain.from_iterable(boards))
+    return np.fromiter(map(SQUARE_CODES.__getitem__, squares), dtype=np.uint8).reshape(-1, 64)
+
+
+def pack_boards(boards):
+    """Packs ``ChessGame.board`` lists into a plane tensor."""
+    return codes_to_planes(board_codes(boards))
+
+
+def _expand_placement(fen):
+    placement = fen.split(' ', 1)[0]
+    for digit in '2345678':
+        placement = placement.replace(digit, '1' * int(digit))
+    ranks = placement.split('/')
+    if len(ranks) != 8 or any(len(rank) != 8 or not _FEN_SQUARES.issuperset(rank) for rank in ranks):
+        raise ValueError(f"invalid FEN placement, expected 8 ranks of 8 squares: {fen!r}")
+    return ''.join(ranks)
+
+
+def pack_fens(fens):
+    """Packs the piece placement field of FEN strings, raises ValueError on a malformed one."""
+    placement = ''.join(map(_expand_placement, fens))
+    codes = np.frombuffer(placement.encode('ascii').translate(_FEN_TABLE), dtype=np.uint8)
+    return codes_to_planes(codes)
+
+
+def material_scores(planes):
+    """Material balance per position, same values as ``ChessGame.evaluate_board``."""
+    counts = planes.sum(axis=(2, 3), dtype=np.int64)
+    return counts @ MATERIAL_WEIGHTS
+
+
+def positional_scores(planes):
+    """Piece-square table balance per position, in pawns."""
+    flat = planes.reshape(len(planes), -1)
+    return flat @ POSITIONAL_WEIGHTS.reshape(-1)
+
+
+def evaluate_batch(planes, chunk_size=65536):
+    """Returns ``(material, positional)`` score arrays for a plane tensor, chunked to bound temporaries."""
+    material = np.empty(len(planes), dtype=np.float64)
+    positional = np.empty(len(planes), dtype=np.float64)
+    for start in range(0, len(planes), chunk_size):
+        chunk = planes[start:start + chunk_size]
+        material[start:start + chunk_size] = material_scores(chunk)
+        positional[start:start + chunk_size] = positional_scores(chunk)
+    return material, positional
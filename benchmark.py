@@ -0,0 +1,266 @@
+"""Micro-benchmarks for the rules and rendering hot paths.
+
+Runs headless (SDL dummy video driver) on a fixed set of positions and compares
+the timings with a JSON baseline:
+
+    python benchmark.py --save             # record a new baseline
+    python benchmark.py                    # compare with it (20% threshold)
+    python benchmark.py --threshold 0.5 -k minimax
+
+Every case runs over all of POSITIONS; the reported time is per position.
+The ``startup.*`` cases launch a fresh interpreter that opens the Display and
+draws one frame; ``startup.time to first frame`` is the wall time from process
+launch to the first flip, the other cases are its phases (best of --repeat).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from game_controller import GameController
+from game_loader import load_chess_game
+
+POSITIONS = {
+    'start': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1',
+    'italian': 'r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w - - 4 4',
+    'kiwipete': 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 1',
+    'endgame': '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'mated': 'rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w - - 1 3',
+}
+PIECE_TYPES = ['Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King']
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json')
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_DEPTH = 1
+
+# Run by a fresh interpreter: prints the startup phases once the first frame is on screen
+STARTUP_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import pygame
+imported_pygame = time.perf_counter()
+from display import Display
+imported = time.perf_counter()
+display = Display()
+created = time.perf_counter()
+display._draw_frame()
+drawn = time.perf_counter()
+print(json.dumps({'import pygame': imported_pygame - start, 'import display': imported - imported_pygame,
+                  'Display()': created - imported, 'first frame': drawn - created}), flush=True)
+'''
+STARTUP_CASES = ['startup.import pygame', 'startup.import display', 'startup.Display()', 'startup.first frame',
+                 'startup.time to first frame']
+
+
+def make_controller(fen):
+    controller = GameController()
+    controller.board.load_fen(fen)
+    controller.current_turn = 'white' if fen.split()[1] == 'w' else 'black'
+    return controller
+
+
+def make_game(fen):
+    game = load_chess_game().ChessGame()
+    game.load_fen(fen)
+    return game
+
+
+def _busiest_piece(controller):
+    """Piece of the side to move with the most moves, so the highlight path has work to do."""
+    board = controller.board.board
+    pieces = [piece for row in board for piece in row if piece is not None and piece.color == controller.current_turn]
+    return max(pieces, key=lambda piece: len(piece.get_legal_moves(board)), default=None)
+
+
+def _selected(name, pattern):
+    return not pattern or pattern.lower() in name.lower()
+
+
+def build_cases(depth=DEFAULT_DEPTH, pattern=None):
+    """Returns {name: callable} for the cases matching ``pattern``, each callable covering every position once."""
+    cases = {}
+    controllers = [make_controller(fen) for fen in POSITIONS.values()]
+    games = [make_game(fen) for fen in POSITIONS.values()]
+
+    for piece_type in PIECE_TYPES:
+        pieces = [(controller.board.board, piece)
+                  for controller in controllers
+                  for row in controller.board.board
+                  for piece in row
+                  if piece is not None and type(piece).__name__ == piece_type]
+
+        def run_legal_moves(pieces=pieces):
+            for board, piece in pieces:
+                piece.get_legal_moves(board)
+        cases[f'{piece_type}.get_legal_moves'] = run_legal_moves
+
+        def run_iter_moves(pieces=pieces):
+            for board, piece in pieces:
+                for _ in piece.iter_moves(board):
+                    pass
+        cases[f'{piece_type}.iter_moves'] = run_iter_moves
+
+    def run_is_in_check():
+        for controller in controllers:
+            controller.is_in_check(controller.current_turn)
+
+    def run_is_checkmate():
+        for controller in controllers:
+            controller.is_checkmate(controller.current_turn)
+
+    def run_generate_all_valid_moves():
+        for game in games:
+            game.generate_all_valid_moves(game.current_turn)
+
+    def run_evaluate_board():
+        for game in games:
+            game.evaluate_board()
+
+    def run_minimax():
+        for game in games:
+            game.minimax(depth, game.current_turn == 'w')
+
+    cases['GameController.is_in_check'] = run_is_in_check
+    cases['GameController.is_checkmate'] = run_is_checkmate
+    cases['ChessGame.generate_all_valid_moves'] = run_generate_all_valid_moves
+    cases['ChessGame.evaluate_board'] = run_evaluate_board
+    cases[f'ChessGame.minimax[depth={depth}]'] = run_minimax
+    cases = {name: func for name, func in cases.items() if _selected(name, pattern)}
+    if _selected('Display.frame', pattern): # Opens a window and loads the sprites, only when asked for
+        cases['Display.frame'] = _display_case()
+    return cases
+
+
+def _display_case():
+    from display import Display
+
+    display = Display()
+    controllers = [make_controller(fen) for fen in POSITIONS.values()]
+    for controller in controllers:
+        controller.selected_piece = _busiest_piece(controller)
+
+    def run_frame():
+        for controller in controllers:
+            display._game_controller = controller
+            display._draw_frame()
+    return run_frame
+
+
+def time_case(func, min_time=0.2, repeat=5):
+    """Best-of-``repeat`` seconds per call, each batch lasting about ``min_time``."""
+    start = time.perf_counter()
+    func()
+    single = time.perf_counter() - start
+    number = max(1, int(min_time / max(single, 1e-9)))
+    best = single
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def time_startup(repeat=5):
+    """Best-of-``repeat`` startup phases in seconds, after one warm-up launch that fills the asset cache."""
+    best = {}
+    for attempt in range(repeat + 1):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-c', STARTUP_SCRIPT], stdout=subprocess.PIPE,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        for line in process.stdout:
+            if line.startswith(b'{'): # Skip pygame's banner
+                break
+        first_frame = time.perf_counter() - start
+        process.wait()
+        if process.returncode:
+            raise RuntimeError(f"startup script failed with exit code {process.returncode}")
+        if attempt == 0:
+            continue
+        phases = dict(json.loads(line), **{'time to first frame': first_frame})
+        for phase, seconds in phases.items():
+            best[phase] = min(seconds, best.get(phase, seconds))
+    return {f'startup.{phase}': seconds for phase, seconds in best.items()}
+
+
+def run(depth=DEFAULT_DEPTH, pattern=None, min_time=0.2, repeat=5):
+    results = {}
+    startup_cases = [name for name in STARTUP_CASES if _selected(name, pattern)]
+    if startup_cases:
+        startup = time_startup(repeat)
+        for name in startup_cases:
+            results[name] = startup[name]
+            print(f"{name:<40} {results[name] * 1e3:12.1f} ms")
+    for name, func in build_cases(depth, pattern).items():
+        results[name] = time_case(func, min_time, repeat) / len(POSITIONS)
+        print(f"{name:<40} {results[name] * 1e6:12.1f} us/position")
+    return results
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'positions': list(POSITIONS),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Prints a comparison table and returns the names slower than ``1 + threshold`` times the baseline."""
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f"{name:<40} (no baseline)")
+            continue
+        ratio = seconds / baseline[name]
+        status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+        print(f"{name:<40} {ratio:7.2f}x  {status}")
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown before a case counts as a regression (0.2 = 20%%)')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help='minimax depth')
+    parser.add_argument('-k', dest='pattern', help='only run cases whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timing batch')
+    parser.add_argument('--repeat', type=int, default=5, help='timing batches per case')
+    args = parser.parse_args(argv)
+
+    results = run(args.depth, args.pattern, args.min_time, args.repeat)
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save first.")
+        return 0
+    print()
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
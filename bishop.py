@@ -3,10 +3,9 @@ from piece import Piece
 class Bishop(Piece):
     def __init__(self, color: str, position: tuple):
         super().__init__(color, position)
-        self.image_file = f"images/{self.color}_bishop.png"
+        self.image_file = f"images/{self.color[0]}B.png"
 
-    def get_legal_moves(self, board):
-        moves = []
+    def iter_moves(self, board):
         directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
         for direction in directions:
             for i in range(1, len(board)):
@@ -15,12 +14,11 @@ class Bishop(Piece):
                 if 0 <= new_row < len(board) and 0 <= new_col < len(board[0]):
                     target_square = board[new_row][new_col]
                     if target_square is None:
-                        moves.append((new_row, new_col))
+                        yield (new_row, new_col)
                     elif target_square.color != self.color:
-                        moves.append((new_row, new_col))
+                        yield (new_row, new_col)
                         break
                     else:
                         break
                 else:
                     break
-        return moves
@@ -4,13 +4,19 @@ from bishop import Bishop
 from rook import Rook
 from queen import Queen
 from king import King
-from piece import Piece
 
+FEN_PIECES = {'p': Pawn, 'n': Knight, 'b': Bishop, 'r': Rook, 'q': Queen, 'k': King}
+# Order of iter_pieces: the likeliest checkers first, so is_in_check usually stops early
+PIECE_ORDER = (Queen, Rook, Bishop, Knight, Pawn, King)
 
 class Board:
     def __init__(self):
         self.board = [[None for _ in range(8)] for _ in range(8)]
+        self.turn = 'white'
+        # Undo records for push/pop: (piece, start, end, captured piece, turn before the move)
+        self._undo_stack = []
         self._setup_pieces()
+        self._index_pieces()
 
     def _setup_pieces(self):
         # Set up pawns
@@ -24,19 +30,75 @@ class Board:
             self.board[0][col] = piece_cls('white', (0, col))
             self.board[7][col] = piece_cls('black', (7, col))
 
-    def move_piece(self, piece: Piece, new_position: tuple):
-        old_position = piece.position
-        self.board[old_position[0]][old_position[1]] = None
-        self.board[new_position[0]][new_position[1]] = piece
-        piece.move(new_position)
-        
+    def _index_pieces(self):
+        # color -> piece class -> set of pieces; push/pop keep it in sync, so loops over
+        # the pieces and find_king do not scan the 64 squares
+        self.pieces = {color: {piece_cls: set() for piece_cls in PIECE_ORDER} for color in ('white', 'black')}
+        for row in self.board:
+            for piece in row:
+                if piece is not None:
+                    self.pieces[piece.color][type(piece)].add(piece)
+
+    def iter_pieces(self, color):
+        """The pieces of ``color`` still on the board (a list: the board may change while it is used)."""
+        return [piece for pieces in self.pieces[color].values() for piece in pieces]
+
+    def load_fen(self, fen: str):
+        # Piece placement and side to move are used, row 0 is rank 1 (white side)
+        fields = fen.split()
+        self.board = [[None for _ in range(8)] for _ in range(8)]
+        self.turn = 'black' if len(fields) > 1 and fields[1] == 'b' else 'white'
+        self._undo_stack = []
+        for rank_index, rank in enumerate(fields[0].split('/')):
+            row = 7 - rank_index
+            col = 0
+            for char in rank:
+                if char.isdigit():
+                    col += int(char)
+                else:
+                    color = 'white' if char.isupper() else 'black'
+                    self.board[row][col] = FEN_PIECES[char.lower()](color, (row, col))
+                    col += 1
+        self._index_pieces()
+
+    def push(self, move: tuple):
+        """Plays move = (start, end) and switches the side to move, returns the captured piece.
+        Undone with pop(), which puts any captured piece back."""
+        start, end = move
+        piece = self.board[start[0]][start[1]]
+        captured = self.board[end[0]][end[1]]
+        self._undo_stack.append((piece, start, end, captured, self.turn))
+        self.board[start[0]][start[1]] = None
+        self.board[end[0]][end[1]] = piece
+        piece.position = end
+        if captured is not None:
+            self.pieces[captured.color][type(captured)].discard(captured)
+        self.turn = 'black' if self.turn == 'white' else 'white'
+        return captured
+
+    def pop(self):
+        """Undoes the last push() and returns its move."""
+        piece, start, end, captured, turn = self._undo_stack.pop()
+        self.board[end[0]][end[1]] = captured
+        self.board[start[0]][start[1]] = piece
+        piece.position = start
+        if captured is not None:
+            self.pieces[captured.color][type(captured)].add(captured)
+        self.turn = turn
+        return start, end
+
     def affiche(self):
         for row in self.board:
             print([(f"{piece.color} {piece.__class__.__name__}", (piece.position[0], piece.position[1])) if piece is not None else None for piece in row])
 
+    def iter_moves(self, color):
+        """Yields the (start, end) moves of ``color``, generated piece by piece as they are asked for.
+        The board may be changed between two moves if it is restored (push/pop)."""
+        for piece in self.iter_pieces(color):
+            start = piece.position
+            for end in piece.iter_moves(self.board):
+                yield start, end
+
     def find_king(self, color):
-        for row in self.board:
-            for piece in row:
-                if piece is not None and isinstance(piece, King) and piece.color == color:
-                    return piece.position
-        return None
\ No newline at end of file
+        kings = self.pieces[color][King]
+        return next(iter(kings)).position if kings else None
\ No newline at end of file
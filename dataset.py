@@ -0,0 +1,192 @@
+"""Streaming position dataset generator for engine tuning.
+
+Worker processes play random (or AI level 0-2) ``ChessGame`` games and write
+positions in fixed-size ``.npy`` chunks of RECORD_DTYPE records. Mobility and
+in-check features are computed per chunk with array operations, so memory per
+worker is bounded by the chunk size:
+
+    python dataset.py data/ --positions 1000000 --chunk-size 65536
+
+Mobility counts the same pseudo-legal moves as
+``ChessGame.generate_all_valid_moves``; ``in_check`` matches
+``ChessGame.is_king_in_check``. Both are indexed [white, black].
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from batch_eval import PIECE_CODES, board_codes
+from game_loader import load_chess_game
+
+RECORD_DTYPE = np.dtype([
+    ('board', np.uint8, 64),      # square codes, see batch_eval.PLANE_PIECES (row 0 = rank 8)
+    ('side', np.uint8),           # 0 white to move, 1 black
+    ('ply', np.uint16),
+    ('mobility', np.uint16, 2),
+    ('in_check', np.uint8, 2),
+])
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_MAX_PLIES = 200
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+# --- Vectorised features ---
+
+def _shift(mask, dr, dc):
+    """Moves every set square of (N, 8, 8) ``mask`` by (dr, dc), dropping what leaves the board."""
+    out = np.zeros_like(mask)
+    out[:, max(dr, 0):8 + min(dr, 0), max(dc, 0):8 + min(dc, 0)] = \
+        mask[:, max(-dr, 0):8 + min(-dr, 0), max(-dc, 0):8 + min(-dc, 0)]
+    return out
+
+
+def _count(mask):
+    return mask.sum(axis=(1, 2), dtype=np.int64)
+
+
+def _side_features(boards, color, empty):
+    """Returns (pseudo-legal move count, attacked squares) for one side."""
+    piece = {kind: boards == PIECE_CODES[color + kind] for kind in 'PNBRQK'}
+    own = np.zeros_like(empty)
+    for mask in piece.values():
+        own |= mask
+    enemy = ~(own | empty)
+    not_own = ~own
+    moves = np.zeros(len(boards), dtype=np.int64)
+    attacked = np.zeros_like(empty)
+
+    for kind, offsets in (('N', KNIGHT_OFFSETS), ('K', KING_OFFSETS)):
+        for dr, dc in offsets:
+            target = _shift(piece[kind], dr, dc)
+            attacked |= target
+            moves += _count(target & not_own)
+
+    for kinds, directions in (('RQ', ROOK_DIRECTIONS), ('BQ', BISHOP_DIRECTIONS)):
+        sliders = piece[kinds[0]] | piece[kinds[1]]
+        for dr, dc in directions:
+            frontier = sliders
+            for _ in range(7):
+                frontier = _shift(frontier, dr, dc)
+                attacked |= frontier
+                moves += _count(frontier & not_own)
+                frontier = frontier & empty
+                if not frontier.any():
+                    break
+
+    direction = -1 if color == 'w' else 1
+    start_row = 6 if color == 'w' else 1
+    single = _shift(piece['P'], direction, 0) & empty
+    from_start = np.zeros_like(empty)
+    from_start[:, start_row + direction] = single[:, start_row + direction]
+    double = _shift(from_start, direction, 0) & empty
+    moves += _count(single) + _count(double)
+    for dc in (-1, 1):
+        target = _shift(piece['P'], direction, dc)
+        attacked |= target
+        moves += _count(target & enemy)
+    return moves, attacked, piece['K']
+
+
+def batch_features(codes):
+    """Mobility (N, 2) and in-check flags (N, 2) for (N, 64) square codes."""
+    boards = np.asarray(codes, dtype=np.uint8).reshape(-1, 8, 8)
+    empty = boards == 0
+    white_moves, white_attacks, white_king = _side_features(boards, 'w', empty)
+    black_moves, black_attacks, black_king = _side_features(boards, 'b', empty)
+    mobility = np.stack([white_moves, black_moves], axis=1)
+    in_check = np.stack([(white_king & black_attacks).any(axis=(1, 2)),
+                         (black_king & white_attacks).any(axis=(1, 2))], axis=1)
+    return mobility, in_check
+
+
+# --- Game play ---
+
+def play_game(rng, ai_level=None, max_plies=DEFAULT_MAX_PLIES):
+    """Plays one game, yielding (board, side, ply) before every move."""
+    game = load_chess_game().ChessGame()
+    for ply in range(max_plies):
+        if game.game_over or game.find_king('w') is None or game.find_king('b') is None:
+            return
+        yield game.board, game.current_turn, ply
+        if ai_level is None:
+            moves = game.generate_all_valid_moves(game.current_turn)
+            move = rng.choice(moves) if moves else None
+        else:
+            move = getattr(game, f'get_ai_move_level_{ai_level}')()
+        if move is None:
+            return
+        game.make_move(move[0], move[1])
+
+
+def generate_chunk(args):
+    """Worker task: fills and writes one chunk, returns (path, record count)."""
+    out_dir, index, chunk_size, ai_level, max_plies, seed = args
+    rng = random.Random(seed)
+    random.seed(seed)  # the AI levels use the module-level generator
+    boards, sides, plies = [], [], []
+    while len(boards) < chunk_size:
+        for board, side, ply in play_game(rng, ai_level, max_plies):
+            boards.append(board_codes([board])[0])
+            sides.append(0 if side == 'w' else 1)
+            plies.append(ply)
+            if len(boards) == chunk_size:
+                break
+
+    records = np.zeros(len(boards), dtype=RECORD_DTYPE)
+    records['board'] = np.stack(boards)
+    records['side'] = sides
+    records['ply'] = plies
+    mobility, in_check = batch_features(records['board'])
+    records['mobility'] = mobility
+    records['in_check'] = in_check
+    path = os.path.join(out_dir, f'chunk_{index:05d}.npy')
+    np.save(path, records)
+    return path, len(records)
+
+
+def generate(out_dir, positions, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, ai_level=None,
+             max_plies=DEFAULT_MAX_PLIES, seed=0):
+    """Writes ``positions`` records (rounded up to whole chunks) using ``workers`` processes."""
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = -(-positions // chunk_size)
+    tasks = [(out_dir, index, chunk_size, ai_level, max_plies, seed + index) for index in range(chunks)]
+    written = 0
+    start = time.perf_counter()
+    with Pool(workers or os.cpu_count()) as pool:
+        for path, count in pool.imap_unordered(generate_chunk, tasks):
+            written += count
+            elapsed = time.perf_counter() - start
+            print(f"{path}: {count} positions ({written}/{chunks * chunk_size}, {written / elapsed:.0f} pos/s)")
+    return written
+
+
+def load_chunks(out_dir):
+    """Yields the chunks of a dataset directory as read-only memory maps."""
+    for path in sorted(glob.glob(os.path.join(out_dir, 'chunk_*.npy'))):
+        yield np.load(path, mmap_mode='r')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a position dataset with mobility and check features.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--positions', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help='default: all cores')
+    parser.add_argument('--ai-level', type=int, choices=[0, 1, 2], default=None, help='default: random moves')
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    generate(args.out_dir, args.positions, args.chunk_size, args.workers, args.ai_level, args.max_plies, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 import pygame
+from asset_cache import get_font, load_sprites
+from frame_profiler import FrameProfiler
 from game_controller import GameController
 
 class Display:
@@ -9,6 +11,7 @@ class Display:
         self._square_size = self._screen_width // self._board_size
 
         self._game_controller = GameController()
+        self._profiler = FrameProfiler() # F3: frame time HUD, F4: export, F5: cProfile
 
         pygame.init()
         self._screen = pygame.display.set_mode((self._screen_width, self._screen_height))
@@ -16,42 +19,54 @@ class Display:
         pygame.display.set_caption("Chess")
         self._load_images()
 
-        # Initialize font
-        pygame.font.init()
-        self._font = pygame.font.SysFont('Arial', 24)
+        # The font is looked up on first use, see _font
+        self._label_font = None
 
     def _load_images(self):
-        self._images = {}
-        for row in self._game_controller.board.board:
-            for piece in row:
-                if piece is not None:
-                    if piece.image_file not in self._images:
-                        image = pygame.image.load(piece.image_file)
-                        image = pygame.transform.scale(image, (self._square_size, self._square_size))
-                        self._images[piece.image_file] = image
+        image_files = [piece.image_file for row in self._game_controller.board.board for piece in row if piece is not None]
+        self._images = load_sprites(image_files, self._square_size)
+
+    @property
+    def _font(self):
+        if self._label_font is None:
+            self._label_font = get_font('Arial', 24)
+        return self._label_font
 
     def run_game(self):
         running = True
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    x, y = event.pos
-                    row = y // self._square_size
-                    col = x // self._square_size
-                    self._game_controller.handle_click((row, col))
+            self._profiler.start_frame()
+            with self._profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.MOUSEBUTTONDOWN:
+                        self._profiler.mark_input()
+                        x, y = event.pos
+                        row = y // self._square_size
+                        col = x // self._square_size
+                        with self._profiler.phase('rules'):
+                            self._game_controller.handle_click((row, col))
+                    elif event.type == pygame.KEYDOWN:
+                        self._profiler.handle_key(event.key)
+
+            self._draw_frame()
+            self._profiler.end_frame()
+            self._clock.tick(60)
+
+        pygame.quit()
 
+    def _draw_frame(self):
+        with self._profiler.phase('draw'):
             self._screen.fill(pygame.Color('white'))
             self._draw_board()
             self._draw_pieces()
             self._draw_turn_label()
             if self._game_controller.game_over:
                 self._draw_game_over_message()
+            self._profiler.draw_hud(self._screen)
+        with self._profiler.phase('flip'):
             pygame.display.flip()
-            self._clock.tick(60)
-
-        pygame.quit()
 
     def _draw_board(self):
         colors = [pygame.Color('white'), pygame.Color('gray')]
@@ -61,8 +76,10 @@ class Display:
                 pygame.draw.rect(self._screen, color, pygame.Rect(col * self._square_size, row * self._square_size, self._square_size, self._square_size))
 
         self._highlight_selected_piece()
-        self._highlight_legal_moves()
-        self._highlight_king_in_check()
+        # Legal move and check highlights query the rules every frame
+        with self._profiler.phase('rules'):
+            self._highlight_legal_moves()
+            self._highlight_king_in_check()
 
     def _highlight_selected_piece(self):
         piece = self._game_controller.selected_piece
@@ -73,16 +90,17 @@ class Display:
     def _highlight_legal_moves(self):
         piece = self._game_controller.selected_piece
         if piece is not None:
-            original_position = piece.position
-            legal_moves = piece.get_legal_moves(self._game_controller.board.board)
+            board = self._game_controller.board
+            legal_moves = piece.get_legal_moves(board.board)
             for move in legal_moves:
-                self._game_controller.board.move_piece(piece, move)
-                if not self._game_controller.is_in_check(piece.color):
+                board.push((piece.position, move))
+                in_check = self._game_controller.is_in_check(piece.color)
+                board.pop()
+                if not in_check:
                     row, col = move
                     center_x = col * self._square_size + self._square_size // 2
                     center_y = row * self._square_size + self._square_size // 2
                     pygame.draw.circle(self._screen, pygame.Color('blue'), (center_x, center_y), 5)
-                self._game_controller.board.move_piece(piece, original_position)
 
     def _highlight_king_in_check(self):
         for color in ['white', 'black']:
@@ -108,7 +126,7 @@ class Display:
         self._screen.blit(label, (10, self._screen_width + 10))  # Position label below the board
 
     def _draw_game_over_message(self):
-        game_over_text = f"Checkmate! {self._game_controller.current_turn.capitalize()} wins!"
+        game_over_text = f"Checkmate! {self._game_controller.winner.capitalize()} wins!"
         label = self._font.render(game_over_text, True, pygame.Color('red'))
         rect = label.get_rect(center=(self._screen_width // 2, self._screen_height - 20))
         self._screen.blit(label, rect)
@@ -0,0 +1,177 @@
+"""EPD test-suite runner: engine strength regression test for the level 3 search.
+
+Each EPD line holds a position (placement, side, castling, en passant) and
+operations; ``bm`` lists the best moves, ``am`` moves to avoid, ``id`` names
+the position. Moves are SAN (``Nf6+``, ``exd5``) or coordinates (``e2e4``);
+castling and underpromotions cannot be played by ``ChessGame``, positions
+that need them are reported as unsupported.
+
+Positions are searched in parallel processes, each for ``--movetime``
+seconds. A position is solved when the final best move is a ``bm`` move (or,
+with only ``am``, not an ``am`` move); its time and nodes to solution are
+those of the first iteration from which the best move stayed a solution.
+
+    python epd_suite.py suites/tactics.epd --movetime 2 --out run.json
+    python epd_suite.py suites/tactics.epd --disable null_move --compare run.json
+"""
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+from multiprocessing import Pool
+
+from game_loader import load_chess_game
+from search import FEATURES, Searcher, SearchLimits
+
+DEFAULT_MOVETIME = 2.0
+OPERATION_PATTERN = re.compile(r'(\w+)\s*("[^"]*"|[^;]*);')
+SAN_PATTERN = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(=?Q)?[+#]?[!?]*$')
+
+
+def parse_epd(line):
+    """(fen, {operation: value}) for one EPD line, or None for blank and comment lines."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    fields = line.split(maxsplit=4)
+    operations = {name: value.strip().strip('"')
+                  for name, value in OPERATION_PATTERN.findall(fields[4] if len(fields) > 4 else '')}
+    return ' '.join(fields[:4]), operations
+
+
+def load_suite(path):
+    """[{'id', 'fen', 'bm', 'am'}] from an EPD file; bm/am stay as written."""
+    positions = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            parsed = parse_epd(line)
+            if parsed is None:
+                continue
+            fen, operations = parsed
+            positions.append({'id': operations.get('id') or f"{path}:{number}", 'fen': fen,
+                              'bm': operations.get('bm', '').split(), 'am': operations.get('am', '').split()})
+    return positions
+
+
+def parse_san(game, san):
+    """Move tuple for a SAN or coordinate move of the side to move, None if it cannot be played."""
+    move = game.parse_move(san)
+    if move is not None:
+        return move
+    match = SAN_PATTERN.match(san)
+    if match is None:
+        return None # Castling, underpromotion or garbage
+    piece, file, rank, target, _promotion = match.groups()
+    end = (8 - int(target[1]), ord(target[0]) - ord('a'))
+    candidates = [move for move in game.generate_all_valid_moves(game.current_turn)
+                  if move[1] == end and game.board[move[0][0]][move[0][1]][1] == (piece or 'P')
+                  and (file is None or move[0][1] == ord(file) - ord('a'))
+                  and (rank is None or move[0][0] == 8 - int(rank))]
+    if len(candidates) > 1:
+        # SAN only disambiguates between legal moves: drop the ones leaving the king attacked
+        color = game.current_turn
+        legal = []
+        for move in candidates:
+            game.make_move(*move)
+            if not game.is_king_in_check(color):
+                legal.append(move)
+            game.undo_move()
+        candidates = legal
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def _move_to_str(game, move):
+    return game._coords_to_algebraic(move[0]) + game._coords_to_algebraic(move[1])
+
+
+def solve_position(args):
+    """Pool task: searches one position, returns its report entry."""
+    position, movetime, disabled = args
+    game = load_chess_game().ChessGame()
+    game.load_fen(position['fen'])
+    best = [parse_san(game, san) for san in position['bm']]
+    avoid = [parse_san(game, san) for san in position['am']]
+    entry = {'id': position['id'], 'fen': position['fen'], 'bm': position['bm'], 'am': position['am']}
+    if None in best or None in avoid or not (best or avoid):
+        return dict(entry, status='unsupported')
+
+    searcher = Searcher(**{feature: feature not in disabled for feature in FEATURES})
+    result = solution = None
+    for result in searcher.iterate(game, SearchLimits(movetime=movetime)):
+        solved = result.move in best if best else result.move not in avoid
+        if not solved:
+            solution = None
+        elif solution is None:
+            solution = result
+    if result is None:
+        return dict(entry, status='no moves')
+    return dict(entry, status='solved' if solution else 'failed', move=_move_to_str(game, result.move),
+                score=result.score, depth=result.depth, nodes=result.nodes, time=round(result.elapsed, 3),
+                time_to_solution=round(solution.elapsed, 3) if solution else None,
+                nodes_to_solution=solution.nodes if solution else None,
+                depth_to_solution=solution.depth if solution else None)
+
+
+def run(path, movetime=DEFAULT_MOVETIME, workers=None, disabled=()):
+    positions = load_suite(path)
+    with Pool(workers) as pool:
+        entries = pool.map(solve_position, [(position, movetime, list(disabled)) for position in positions])
+    solved = [entry for entry in entries if entry['status'] == 'solved']
+    return {
+        'meta': {'suite': path, 'movetime': movetime, 'disabled': sorted(disabled),
+                 'python': platform.python_version(), 'created': time.strftime('%Y-%m-%d %H:%M:%S')},
+        'summary': {
+            'positions': len(entries),
+            'supported': sum(entry['status'] != 'unsupported' for entry in entries),
+            'solved': len(solved),
+            'time_to_solution': round(sum(entry['time_to_solution'] for entry in solved), 3),
+            'nodes_to_solution': sum(entry['nodes_to_solution'] for entry in solved),
+        },
+        'positions': entries,
+    }
+
+
+def compare(report, baseline):
+    """Prints (to stderr, stdout may hold the report) the positions whose result changed;
+    returns the change in solved count."""
+    old_entries = {entry['id']: entry for entry in baseline['positions']}
+    for entry in report['positions']:
+        old = old_entries.get(entry['id'])
+        if old is None:
+            print(f"{entry['id']:<30} new position: {entry['status']}", file=sys.stderr)
+        elif old['status'] != entry['status']:
+            print(f"{entry['id']:<30} {old['status']} -> {entry['status']}", file=sys.stderr)
+        elif entry['status'] == 'solved':
+            print(f"{entry['id']:<30} solved, time {old['time_to_solution']} -> {entry['time_to_solution']} s, "
+                  f"nodes {old['nodes_to_solution']} -> {entry['nodes_to_solution']}", file=sys.stderr)
+    change = report['summary']['solved'] - baseline['summary']['solved']
+    print(f"Solved {baseline['summary']['solved']} -> {report['summary']['solved']} ({change:+d})", file=sys.stderr)
+    return change
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('suite', help='EPD file')
+    parser.add_argument('--movetime', type=float, default=DEFAULT_MOVETIME, help='seconds per position')
+    parser.add_argument('--workers', type=int, default=None, help='processes, default: all cores')
+    parser.add_argument('--disable', action='append', choices=FEATURES, default=[], help='search feature to turn off')
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='earlier JSON report to compare with')
+    args = parser.parse_args(argv)
+
+    report = run(args.suite, args.movetime, args.workers, args.disable)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(report, json.load(f)) < 0 else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
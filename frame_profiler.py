@@ -0,0 +1,204 @@
+"""Frame-time profiler and HUD for the pygame front ends.
+
+Every frame is split in phases ('events', 'rules', 'draw', 'flip', ...),
+timed exclusively: a 'rules' phase inside 'draw' is not counted twice. The
+time from a mouse click being handled to the flip that shows its result is
+kept as the input latency. Frame times exclude the ``clock.tick`` wait.
+
+    profiler.start_frame()
+    with profiler.phase('events'):
+        ...
+        profiler.mark_input()              # on a click
+    ...
+    profiler.end_frame()                   # after the flip
+
+Keys (``handle_key``): F3 shows the HUD, F4 writes the frames to
+``profiles/frames_<time>.csv`` and ``.json``, F5 records the next
+PROFILE_FRAMES frames with cProfile into ``profiles/profile_<time>.prof``.
+"""
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pygame
+
+from asset_cache import get_font
+
+PROFILE_DIR = 'profiles'
+HISTORY_FRAMES = 3600 # One minute at 60 FPS
+PROFILE_FRAMES = 120
+HUD_REFRESH_FRAMES = 15 # The HUD text is rendered again every this many frames
+HUD_BACKGROUND = (0, 0, 0, 170)
+HUD_TEXT_COLOR = (255, 255, 255)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class FrameProfiler:
+    def __init__(self, history=HISTORY_FRAMES):
+        self.frames = deque(maxlen=history) # {'total': s, phase: s, ..., 'input_latency': s or None}
+        self.latencies = deque(maxlen=history)
+        self.show_hud = False
+        self._phases = {}
+        self._stack = []
+        self._started = 0.0
+        self._frame_start = None
+        self._input_time = None
+        self._profile = None
+        self._profile_frames = 0
+        self._hud = None
+        self._hud_age = HUD_REFRESH_FRAMES
+
+    def start_frame(self):
+        self._phases = {}
+        self._stack = []
+        self._frame_start = time.perf_counter()
+
+    def begin(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self._phases[parent] = self._phases.get(parent, 0.0) + now - self._started
+        self._stack.append(name)
+        self._started = now
+
+    def end(self):
+        now = time.perf_counter()
+        name = self._stack.pop()
+        self._phases[name] = self._phases.get(name, 0.0) + now - self._started
+        self._started = now
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def mark_input(self):
+        """A click was handled: its latency runs until the end of the frame that shows it."""
+        if self._input_time is None:
+            self._input_time = time.perf_counter()
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        now = time.perf_counter()
+        frame = dict(self._phases, total=now - self._frame_start, input_latency=None)
+        if self._input_time is not None:
+            frame['input_latency'] = now - self._input_time
+            self.latencies.append(frame['input_latency'])
+            self._input_time = None
+        self.frames.append(frame)
+        self._frame_start = None
+        if self._profile is not None:
+            self._profile_frames -= 1
+            if self._profile_frames <= 0:
+                self.stop_profile()
+
+    def summary(self):
+        """Frame and latency percentiles in milliseconds, and the mean of every phase."""
+        totals = sorted(frame['total'] for frame in self.frames)
+        latencies = sorted(self.latencies)
+        phases = sorted({name for frame in self.frames for name in frame} - {'total', 'input_latency'})
+        ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            'frames': len(totals),
+            'frame_ms': {name: ms(_percentile(totals, fraction))
+                         for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))},
+            'phase_mean_ms': {name: ms(sum(frame.get(name, 0.0) for frame in self.frames) / max(len(totals), 1))
+                              for name in phases},
+            'input_latency_ms': {'count': len(latencies), 'p50': ms(_percentile(latencies, 0.5)),
+                                 'p95': ms(_percentile(latencies, 0.95)), 'max': ms(_percentile(latencies, 1.0))},
+        }
+
+    def export(self, directory=PROFILE_DIR):
+        """Writes the recorded frames as CSV and JSON (with the summary); returns the two paths."""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, time.strftime('frames_%Y%m%d_%H%M%S'))
+        phases = sorted({name for frame in self.frames for name in frame} - {'total', 'input_latency'})
+        columns = ['total'] + phases + ['input_latency']
+        with open(stem + '.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame'] + [f'{column}_ms' for column in columns])
+            for i, frame in enumerate(self.frames):
+                writer.writerow([i] + ['' if frame.get(column) is None else round(frame.get(column, 0.0) * 1000, 3)
+                                       for column in columns])
+        with open(stem + '.json', 'w') as f:
+            json.dump({'summary': self.summary(), 'frames': list(self.frames)}, f)
+        return stem + '.csv', stem + '.json'
+
+    def start_profile(self, frames=PROFILE_FRAMES):
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile_frames = frames
+            self._profile.enable()
+
+    def stop_profile(self, directory=PROFILE_DIR):
+        """Stops the cProfile capture, saves it and prints the top functions; returns the path."""
+        if self._profile is None:
+            return None
+        self._profile.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime('profile_%Y%m%d_%H%M%S.prof'))
+        self._profile.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(self._profile, stream=report).sort_stats('cumulative').print_stats(15)
+        print(report.getvalue())
+        print(f"Profile saved to {path}")
+        self._profile = None
+        return path
+
+    def handle_key(self, key):
+        """F3: toggle the HUD, F4: export the frames, F5: profile the next frames. True if handled."""
+        if key == pygame.K_F3:
+            self.show_hud = not self.show_hud
+            self._hud_age = HUD_REFRESH_FRAMES
+        elif key == pygame.K_F4:
+            print("Frame times saved to {} and {}".format(*self.export()))
+        elif key == pygame.K_F5:
+            if self._profile is None:
+                print(f"Profiling the next {PROFILE_FRAMES} frames...")
+                self.start_profile()
+            else:
+                self.stop_profile()
+        else:
+            return False
+        return True
+
+    def draw_hud(self, surface):
+        """Overlay in the top left corner, if shown."""
+        if not self.show_hud or not self.frames:
+            return
+        self._hud_age += 1
+        if self._hud is None or self._hud_age >= HUD_REFRESH_FRAMES:
+            self._hud_age = 0
+            summary = self.summary()
+            last = self.frames[-1]
+            lines = [f"frame {last['total'] * 1000:.1f} ms  p50 {summary['frame_ms']['p50']:.1f}"
+                     f"  p99 {summary['frame_ms']['p99']:.1f}  max {summary['frame_ms']['max']:.1f}"]
+            lines += [f"{name:<7} {mean:.2f} ms" for name, mean in summary['phase_mean_ms'].items()]
+            latency = summary['input_latency_ms']
+            if latency['count']:
+                lines.append(f"click {latency['p50']:.1f} ms  p95 {latency['p95']:.1f}  max {latency['max']:.1f}")
+            font = get_font('Arial', 14)
+            rendered = [font.render(line, True, HUD_TEXT_COLOR) for line in lines]
+            self._hud = pygame.Surface((max(text.get_width() for text in rendered) + 12,
+                                        sum(text.get_height() for text in rendered) + 8), pygame.SRCALPHA)
+            self._hud.fill(HUD_BACKGROUND)
+            y = 4
+            for text in rendered:
+                self._hud.blit(text, (6, y))
+                y += text.get_height()
+        surface.blit(self._hud, (0, 0))
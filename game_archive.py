@@ -0,0 +1,166 @@
+"""Compact 16-bit move encoding and an append-only binary game archive.
+
+A move is ``from | to << 6 | promotion << 12`` where squares are ``row * 8 + col``
+in the ``ChessGame`` orientation (row 0 is rank 8) and promotion is an index
+into PROMOTIONS (0 for none).
+
+The archive is two files:
+
+* ``<path>``: an 8-byte file header, then one record per game: an 8-byte game
+  header (move count, result, flags, start FEN length), the start FEN if any,
+  padding to an even offset and the packed little-endian ``uint16`` moves.
+* ``<path>.idx``: one little-endian ``uint64`` record offset per game.
+
+Both are only ever appended to and are read through ``mmap``, so
+``archive.moves(i)`` is an O(1) zero-copy view:
+
+    with GameArchive('games.bin') as archive:
+        game_id = archive.append_game(game)
+        moves = archive.moves(game_id)
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from game_loader import load_chess_game
+
+MAGIC = b'CHGA'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')     # magic, version, reserved
+GAME_HEADER = struct.Struct('<HBBHH')    # move count, result, flags, start FEN length, reserved
+OFFSET = struct.Struct('<Q')
+
+PROMOTIONS = [None, 'N', 'B', 'R', 'Q']
+RESULTS = [None, 'w', 'b', 'draw']
+FLAG_START_FEN = 1
+
+GameHeader = namedtuple('GameHeader', ['move_count', 'result', 'start_fen'])
+
+
+def encode_move(start_pos, end_pos, promotion=None):
+    """Packs ((row, col), (row, col), 'Q'/'R'/'B'/'N'/None) into 16 bits."""
+    return (start_pos[0] * 8 + start_pos[1]) | (end_pos[0] * 8 + end_pos[1]) << 6 | PROMOTIONS.index(promotion) << 12
+
+
+def decode_move(code):
+    """Inverse of encode_move."""
+    start, end = code & 63, code >> 6 & 63
+    return (start >> 3, start & 7), (end >> 3, end & 7), PROMOTIONS[code >> 12]
+
+
+def encode_move_log(move_log):
+    """Encodes a ``ChessGame.move_log`` as an ``array('H')``."""
+    return array('H', (encode_move(start, end, promoted_to[1] if promoted_to else None)
+                       for start, end, _captured, promoted_to in move_log))
+
+
+class GameArchive:
+    """Append-only archive of games with O(1) access by game id (single writer)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.idx'
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+            open(self.index_path, 'wb').close()
+        with open(path, 'rb') as f:
+            magic, version, _ = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game archive")
+        self._data = None
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for view in (self._data, self._index):
+            if view is not None:
+                try:
+                    view.close()
+                except BufferError:
+                    pass  # a caller still holds a moves() view, the map goes with the last one
+        self._data = self._index = None
+
+    def __len__(self):
+        return os.path.getsize(self.index_path) // OFFSET.size
+
+    # --- Writing ---
+
+    def append(self, moves, result=None, start_fen=None):
+        """Appends encoded moves and returns the new game id."""
+        moves = array('H', moves)
+        if sys.byteorder == 'big':
+            moves.byteswap()
+        fen = start_fen.encode('ascii') if start_fen else b''
+        flags = FLAG_START_FEN if fen else 0
+        record = GAME_HEADER.pack(len(moves), RESULTS.index(result), flags, len(fen), 0) + fen
+        record += b'\0' * (len(record) % 2) + moves.tobytes()
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(record)
+        # The index entry goes last, so a crash never leaves it pointing at a partial record
+        with open(self.index_path, 'ab') as f:
+            f.write(OFFSET.pack(offset))
+        return len(self) - 1
+
+    def append_game(self, game, start_fen=None):
+        """Appends a ``ChessGame`` (its move log and winner)."""
+        return self.append(encode_move_log(game.move_log), game.winner, start_fen)
+
+    # --- Reading ---
+
+    def _views(self, game_id):
+        if not 0 <= game_id < len(self):
+            raise IndexError(f"game {game_id} not in archive ({len(self)} games)")
+        # Remap when games were appended since the last mapping
+        if self._index is None or len(self._index) <= game_id * OFFSET.size:
+            self.close()
+            with open(self.path, 'rb') as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(self.index_path, 'rb') as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data, OFFSET.unpack_from(self._index, game_id * OFFSET.size)[0]
+
+    def header(self, game_id):
+        data, offset = self._views(game_id)
+        move_count, result, flags, fen_length, _ = GAME_HEADER.unpack_from(data, offset)
+        start_fen = None
+        if flags & FLAG_START_FEN:
+            start = offset + GAME_HEADER.size
+            start_fen = data[start:start + fen_length].decode('ascii')
+        return GameHeader(move_count, RESULTS[result], start_fen)
+
+    def moves(self, game_id):
+        """Encoded moves of a game: a zero-copy ``memoryview`` of uint16 on little-endian hosts."""
+        data, offset = self._views(game_id)
+        move_count, _, _, fen_length, _ = GAME_HEADER.unpack_from(data, offset)
+        start = offset + GAME_HEADER.size + fen_length
+        start += start % 2
+        view = memoryview(data)[start:start + 2 * move_count]
+        if sys.byteorder == 'big':
+            moves = array('H', view)
+            moves.byteswap()
+            return moves
+        return view.cast('H')
+
+    def __getitem__(self, game_id):
+        return self.moves(game_id)
+
+    def replay(self, game_id):
+        """Rebuilds the game as a ``ChessGame`` by replaying its moves."""
+        header = self.header(game_id)
+        game = load_chess_game().ChessGame()
+        if header.start_fen:
+            game.load_fen(header.start_fen)
+        for code in self.moves(game_id):
+            start, end, _promotion = decode_move(code)  # ChessGame always promotes to a queen
+            game.make_move(start, end)
+        return game
@@ -3,9 +3,18 @@ from board import Board
 class GameController:
     def __init__(self):
         self.board = Board()
-        self.current_turn = 'white'
         self.selected_piece = None
         self.game_over = False
+        self.winner = None
+
+    @property
+    def current_turn(self):
+        # The board owns the side to move so that push/pop keep it in sync
+        return self.board.turn
+
+    @current_turn.setter
+    def current_turn(self, color):
+        self.board.turn = color
 
     def switch_turn(self):
         self.current_turn = 'black' if self.current_turn == 'white' else 'white'
@@ -19,11 +28,11 @@ class GameController:
             self.select_piece(position)
         else:
             if self.move_piece(position):
+                # The move switched the turn: the side to move now may be mated
                 if self.is_checkmate(self.current_turn):
-                    print(f"Checkmate! {self.current_turn.capitalize()} wins!")
+                    self.winner = 'black' if self.current_turn == 'white' else 'white'
+                    print(f"Checkmate! {self.winner.capitalize()} wins!")
                     self.game_over = True
-                else:
-                    self.switch_turn()
             else:
                 self.selected_piece = None
 
@@ -40,11 +49,11 @@ class GameController:
         if self.selected_piece:
             legal_moves = self.selected_piece.get_legal_moves(self.board.board)
             if position in legal_moves:
-                original_position = self.selected_piece.position
-                self.board.move_piece(self.selected_piece, position)
-                if self.is_in_check(self.current_turn):
+                color = self.current_turn
+                self.board.push((self.selected_piece.position, position))
+                if self.is_in_check(color):
                     # Undo the move if it leaves the king in check
-                    self.board.move_piece(self.selected_piece, original_position)
+                    self.board.pop()
                     return False
                 self.selected_piece = None
                 return True
@@ -52,39 +61,19 @@ class GameController:
 
     def is_in_check(self, color):
         king_position = self.board.find_king(color)
-        for row in self.board.board:
-            for piece in row:
-                if piece is not None and piece.color != color:
-                    if king_position in piece.get_legal_moves(self.board.board):
-                        return True
+        opponent = 'black' if color == 'white' else 'white'
+        for piece in self.board.iter_pieces(opponent):
+            # Stops generating this piece's moves once it reaches the king
+            if king_position in piece.iter_moves(self.board.board):
+                return True
         return False
 
-    def simulate_move(self, piece, move):
-        """Simulates moving a piece and returns the new board state."""
-        original_position = piece.position
-        target_piece = self.board.board[move[0]][move[1]]
-
-        self.board.board[original_position[0]][original_position[1]] = None
-        self.board.board[move[0]][move[1]] = piece
-        piece.position = move
-
-        return original_position, target_piece
-
-    def undo_move(self, piece, original_position, target_piece):
-        """Undoes a simulated move."""
-        self.board.board[piece.position[0]][piece.position[1]] = target_piece
-        self.board.board[original_position[0]][original_position[1]] = piece
-        piece.position = original_position
-
     def is_checkmate(self, color):
-        for row in self.board.board:
-            for piece in row:
-                if piece is not None and piece.color == color:
-                    original_position = piece.position
-                    for move in piece.get_legal_moves(self.board.board):
-                        original_position, target_piece = self.simulate_move(piece, move)
-                        if not self.is_in_check(color):
-                            self.undo_move(piece, original_position, target_piece)
-                            return False
-                        self.undo_move(piece, original_position, target_piece)
+        # Moves are generated one at a time: the first one that escapes check ends the search
+        for move in self.board.iter_moves(color):
+            self.board.push(move)
+            in_check = self.is_in_check(color)
+            self.board.pop()
+            if not in_check:
+                return False
         return True
@@ -0,0 +1,18 @@
+"""Imports ``Chess game.py``, whose file name is not a valid module name."""
+import importlib.util
+import os
+import sys
+
+MODULE_NAME = "chess_game"
+MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Chess game.py")
+
+
+def load_chess_game():
+    """Returns the ``Chess game.py`` module, importing it once per process."""
+    module = sys.modules.get(MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[MODULE_NAME] = module
+        spec.loader.exec_module(module)
+    return module
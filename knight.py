@@ -3,10 +3,9 @@ from piece import Piece
 class Knight(Piece):
     def __init__(self, color: str, position: tuple):
         super().__init__(color, position)
-        self.image_file = f"images/{self.color}_knight.png"
+        self.image_file = f"images/{self.color[0]}N.png"
 
-    def get_legal_moves(self, board):
-        moves = []
+    def iter_moves(self, board):
         directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
         for direction in directions:
             new_row = self.position[0] + direction[0]
@@ -14,5 +13,4 @@ class Knight(Piece):
             if 0 <= new_row < len(board) and 0 <= new_col < len(board[0]):
                 target_square = board[new_row][new_col]
                 if target_square is None or target_square.color != self.color:
-                    moves.append((new_row, new_col))
-        return moves
+                    yield (new_row, new_col)
@@ -0,0 +1,234 @@
+"""Mate-in-N solver for a ``ChessGame``: proves or disproves a forced mate.
+
+Depth-limited AND/OR search with iterative deepening. The attacker needs one
+move that mates against every defence, the defender needs one reply that
+escapes. Unlike the rest of the engine, moves here are legal: a move may not
+leave its own king attacked, so mate and stalemate are real. Checks are
+tried first, and only checks are tried for the attacker's last move (a quiet
+move cannot mate). Proven and disproven positions go in a table capped at
+``max_entries``, cleared when full like the search's transposition table.
+
+    result = MateSolver().solve(game_or_fen, SearchLimits(depth=3, movetime=30))
+    result.mate_in, result.line, result.nodes
+
+``mate_in`` is None when the side to move has no mate within ``depth`` moves,
+or when a limit stopped the solver first (``complete`` is then False).
+``solver.stop()`` from another thread ends the search the same way; a stopped
+solver stays stopped, so a stop sent before ``solve()`` starts is not lost.
+
+    python mate_solver.py "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1" --moves 3
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from search import SearchLimits, SearchStopped
+
+DEFAULT_MAX_ENTRIES = 500_000
+DEFAULT_MOVES = 3
+
+MateResult = namedtuple('MateResult', ['mate_in', 'line', 'nodes', 'elapsed', 'table_entries', 'complete'])
+
+
+class MateSolver:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.table = {} # position hash -> (moves a mate was proven in or None, moves disproven, mating move)
+        self.max_entries = max_entries
+        self.nodes = 0
+        self.peak_entries = 0
+        self.deadline = None
+        self.node_limit = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def solve(self, position, limits=SearchLimits(depth=DEFAULT_MOVES)):
+        """Looks for the shortest mate of the side to move within ``limits.depth`` moves.
+        The game is searched in place and restored."""
+        if isinstance(position, str):
+            from game_loader import load_chess_game
+            game = load_chess_game().ChessGame()
+            game.load_fen(position)
+        else:
+            game = position
+        module = sys.modules[type(game).__module__]
+        self._zobrist, self._black_to_move = module.ZOBRIST_PIECES, module.ZOBRIST_BLACK_TO_MOVE
+        self.nodes = 0
+        start = time.perf_counter()
+        self.deadline = start + limits.movetime if limits.movetime else None
+        self.node_limit = limits.nodes
+        mate_in, line, complete = None, [], True
+        try:
+            for moves in range(1, (limits.depth or DEFAULT_MOVES) + 1):
+                if self._attack(game, moves):
+                    mate_in = moves
+                    line = self._mating_line(game, moves)
+                    break
+        except SearchStopped:
+            complete = False
+        return MateResult(mate_in, line, self.nodes, time.perf_counter() - start, self.peak_entries, complete)
+
+    def _check_limits(self):
+        if self._stop.is_set():
+            raise SearchStopped()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchStopped()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchStopped()
+
+    def _play(self, game, move):
+        """Makes a move on the board and piece index only (no logs, no game over check); returns what _unplay needs."""
+        (start_row, start_col), (end_row, end_col) = move
+        board = game.board
+        piece = board[start_row][start_col]
+        captured = board[end_row][end_col]
+        placed = piece[0] + 'Q' if piece[1] == 'P' and end_row in (0, 7) else piece # Same auto-queen as make_move
+        board[start_row][start_col] = None
+        board[end_row][end_col] = placed
+        squares = game.piece_squares
+        squares[piece].discard((start_row, start_col))
+        if captured is not None:
+            squares[captured].discard((end_row, end_col))
+        squares[placed].add((end_row, end_col))
+        key = game.position_hash ^ self._zobrist[piece][start_row][start_col] ^ self._black_to_move
+        if captured is not None:
+            key ^= self._zobrist[captured][end_row][end_col]
+        undo = (move, piece, captured, game.position_hash)
+        game.position_hash = key ^ self._zobrist[placed][end_row][end_col]
+        game.current_turn = 'b' if game.current_turn == 'w' else 'w'
+        self.nodes += 1
+        return undo
+
+    def _unplay(self, game, undo):
+        ((start_row, start_col), (end_row, end_col)), piece, captured, key = undo
+        placed = game.board[end_row][end_col]
+        game.board[start_row][start_col] = piece
+        game.board[end_row][end_col] = captured
+        squares = game.piece_squares
+        squares[placed].discard((end_row, end_col))
+        squares[piece].add((start_row, start_col))
+        if captured is not None:
+            squares[captured].add((end_row, end_col))
+        game.position_hash = key
+        game.current_turn = 'b' if game.current_turn == 'w' else 'w'
+
+    def _legal_moves(self, game, first_only=False):
+        """[(move, gives check)] for the side to move, checks first."""
+        color = game.current_turn
+        opponent = 'b' if color == 'w' else 'w'
+        moves = []
+        # A mate test only needs one legal move: generate lazily then
+        for move in game.iter_moves(color) if first_only else game.generate_all_valid_moves(color):
+            undo = self._play(game, move)
+            try:
+                if not game.is_king_in_check(color):
+                    moves.append((move, not first_only and game.is_king_in_check(opponent)))
+            finally:
+                self._unplay(game, undo)
+            if first_only and moves:
+                break
+        moves.sort(key=lambda item: not item[1])
+        return moves
+
+    def _store(self, key, proven=None, disproven=0, move=None):
+        if len(self.table) >= self.max_entries and key not in self.table:
+            self.table.clear()
+        old_proven, old_disproven, old_move = self.table.get(key, (None, 0, None))
+        if proven is not None:
+            self.table[key] = (proven, old_disproven, move)
+        else:
+            self.table[key] = (old_proven, max(old_disproven, disproven), old_move)
+        self.peak_entries = max(self.peak_entries, len(self.table))
+
+    def _attack(self, game, moves):
+        """True if the side to move mates in at most ``moves`` moves."""
+        self._check_limits()
+        key = game.position_hash
+        entry = self.table.get(key)
+        if entry is not None:
+            proven, disproven, _ = entry
+            if proven is not None and proven <= moves:
+                return True
+            if disproven >= moves:
+                return False
+        for move, gives_check in self._legal_moves(game):
+            if moves == 1 and not gives_check:
+                break # Checks come first, the rest cannot mate
+            undo = self._play(game, move)
+            try:
+                mated = self._defend(game, moves)
+            finally:
+                self._unplay(game, undo)
+            if mated:
+                self._store(key, proven=moves, move=move)
+                return True
+        self._store(key, disproven=moves)
+        return False
+
+    def _defend(self, game, moves):
+        """After an attacker move: True if every reply loses within ``moves - 1`` more attacker moves."""
+        if moves == 1:
+            # Only mate itself counts: no legal reply while in check
+            return not self._legal_moves(game, first_only=True) and game.is_king_in_check(game.current_turn)
+        replies = self._legal_moves(game)
+        if not replies:
+            return game.is_king_in_check(game.current_turn) # Stalemate is no mate
+        for reply, _ in replies:
+            undo = self._play(game, reply)
+            try:
+                if not self._attack(game, moves - 1):
+                    return False
+            finally:
+                self._unplay(game, undo)
+        return True
+
+    def _mating_line(self, game, moves):
+        """Attacker moves from the table, against the defence that delays the mate longest."""
+        line, undos = [], []
+        try:
+            while moves > 0 and self._attack(game, moves):
+                move = self.table[game.position_hash][2]
+                line.append(move)
+                undos.append(self._play(game, move))
+                longest, longest_reply = 0, None
+                for reply, _ in self._legal_moves(game):
+                    undo = self._play(game, reply)
+                    try:
+                        needed = next((n for n in range(1, moves) if self._attack(game, n)), moves)
+                    finally:
+                        self._unplay(game, undo)
+                    if needed > longest:
+                        longest, longest_reply = needed, reply
+                if longest_reply is None:
+                    break # Mated
+                line.append(longest_reply)
+                undos.append(self._play(game, longest_reply))
+                moves = longest
+        finally:
+            for undo in reversed(undos):
+                self._unplay(game, undo)
+        return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prove or disprove a forced mate for the side to move.')
+    parser.add_argument('fen')
+    parser.add_argument('--moves', type=int, default=DEFAULT_MOVES, help='longest mate looked for, in moves')
+    parser.add_argument('--movetime', type=float, default=None, help='seconds before giving up')
+    parser.add_argument('--nodes', type=int, default=None, help='nodes before giving up')
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES, help='table size cap')
+    args = parser.parse_args(argv)
+    from game_loader import load_chess_game
+    game = load_chess_game().ChessGame()
+    game.load_fen(args.fen)
+    result = MateSolver(args.max_entries).solve(game, SearchLimits(args.moves, args.movetime, args.nodes))
+    line = [game._coords_to_algebraic(move[0]) + game._coords_to_algebraic(move[1]) for move in result.line]
+    print(json.dumps(dict(result._asdict(), line=line, elapsed=round(result.elapsed, 3))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Random access to the positions of a ``ChessGame`` by ply.
+
+The history keeps a board snapshot every ``interval`` plies (64 characters,
+FEN letters and '.') and the ``move_log`` entries in between. ``board_at``
+starts from the nearest snapshot, before or after the ply, and applies or
+undoes at most ``interval / 2`` moves, so a jump costs the same at move 5
+and at move 500.
+
+    history = MoveHistory.for_game(game)
+    history.sync(game.move_log)        # after moves or undos
+    history.board_at(12)               # 8x8 board after 12 plies
+"""
+
+DEFAULT_INTERVAL = 16
+_CHARS = {None: '.', **{color + kind: kind if color == 'w' else kind.lower() for color in 'wb' for kind in 'PNBRQK'}}
+_PIECES = {char: piece for piece, char in _CHARS.items()}
+
+
+def _pack(board):
+    return ''.join(_CHARS[piece] for row in board for piece in row)
+
+
+def _unpack(snapshot):
+    pieces = [_PIECES[char] for char in snapshot]
+    return [pieces[i:i + 8] for i in range(0, 64, 8)]
+
+
+def _apply(board, entry):
+    (start_row, start_col), (end_row, end_col), _captured, promoted_to = entry
+    board[end_row][end_col] = promoted_to or board[start_row][start_col]
+    board[start_row][start_col] = None
+
+
+def _revert(board, entry):
+    (start_row, start_col), (end_row, end_col), captured, promoted_to = entry
+    board[start_row][start_col] = promoted_to[0] + 'P' if promoted_to else board[end_row][end_col]
+    board[end_row][end_col] = captured
+
+
+class MoveHistory:
+    def __init__(self, board, interval=DEFAULT_INTERVAL):
+        """``board`` is the position before the first move."""
+        self.interval = interval
+        self.moves = [] # move_log entries: (start, end, captured, promoted_to)
+        self.snapshots = [_pack(board)] # snapshots[i]: position after i * interval plies
+        self._tip = [row[:] for row in board]
+
+    @classmethod
+    def for_game(cls, game, interval=DEFAULT_INTERVAL):
+        """History of the moves already in ``game.move_log``."""
+        board = [row[:] for row in game.board]
+        for entry in reversed(game.move_log):
+            _revert(board, entry)
+        history = cls(board, interval)
+        history.sync(game.move_log)
+        return history
+
+    def __len__(self):
+        return len(self.moves)
+
+    def append(self, entry):
+        _apply(self._tip, entry)
+        self.moves.append(entry)
+        if len(self.moves) % self.interval == 0:
+            self.snapshots.append(_pack(self._tip))
+
+    def truncate(self, plies):
+        """Forgets the moves after ``plies`` (undo)."""
+        if plies >= len(self.moves):
+            return
+        del self.moves[plies:]
+        del self.snapshots[plies // self.interval + 1:]
+        self._tip = self.board_at(plies)
+
+    def sync(self, move_log):
+        """Follows a ``move_log`` that may have been undone and replayed since the last call."""
+        common = min(len(move_log), len(self.moves))
+        while common and move_log[common - 1] is not self.moves[common - 1]:
+            common -= 1
+        self.truncate(common)
+        for entry in move_log[common:]:
+            self.append(entry)
+
+    def board_at(self, ply):
+        """New 8x8 board after ``ply`` plies (0: the start position)."""
+        ply = max(0, min(ply, len(self.moves)))
+        base = ply // self.interval
+        if ply - base * self.interval > self.interval // 2 and base + 1 < len(self.snapshots):
+            board = _unpack(self.snapshots[base + 1])
+            for entry in reversed(self.moves[ply:(base + 1) * self.interval]):
+                _revert(board, entry)
+        else:
+            board = _unpack(self.snapshots[base])
+            for entry in self.moves[base * self.interval:ply]:
+                _apply(board, entry)
+        return board
@@ -9,5 +9,9 @@ class Piece(ABC):
         self.position = new_position
         
     @abstractmethod
+    def iter_moves(self, board):
+        # Yields the target squares one at a time, so a caller looking for one move stops early
+        pass
+
     def get_legal_moves(self, board):
-        pass
\ No newline at end of file
+        return list(self.iter_moves(board))
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""On-disk index from position hash to (game id, ply) over a ``GameArchive``.
+
+The index is a directory of sorted, memory-mapped segments plus ``meta.json``.
+``update(archive)`` replays only the games added since the last update, in one
+streaming pass, and writes them as new segments; lookups binary-search every
+segment. ``compact()`` merges the segments into one.
+
+    index = PositionIndex('games.index')
+    index.update(archive)
+    index.lookup_game(game)             # [(game_id, ply), ...] for a live ChessGame
+    index.continuations(game.position_hash, archive)
+
+Keys are ``ChessGame.zobrist_hash()``; ply ``n`` is the position after ``n`` moves.
+"""
+import json
+import os
+import struct
+from collections import Counter
+
+import numpy as np
+
+from game_archive import decode_move
+from game_loader import load_chess_game
+
+SEGMENT_MAGIC = b'CHPI'
+SEGMENT_VERSION = 1
+SEGMENT_HEADER = struct.Struct('<4sIQ')    # magic, version, entry count
+DEFAULT_SEGMENT_ENTRIES = 4_000_000
+
+
+def replay_keys(start_fen, moves):
+    """Yields the position key before the first move and after every move of a game.
+
+    Updates the hash incrementally on a bare board instead of going through
+    ``ChessGame.make_move``, with the same promotion rule (always a queen).
+    """
+    chess_game = load_chess_game()
+    game = chess_game.ChessGame()
+    if start_fen:
+        game.load_fen(start_fen)
+    board = game.board
+    zobrist = chess_game.ZOBRIST_PIECES
+    key = game.zobrist_hash()
+    yield key
+    for code in moves:
+        (start_row, start_col), (end_row, end_col), _promotion = decode_move(code)
+        piece = board[start_row][start_col]
+        captured = board[end_row][end_col]
+        if piece is None:
+            raise ValueError(f"move {code:#06x} starts from an empty square")
+        key ^= zobrist[piece][start_row][start_col]
+        if captured is not None:
+            key ^= zobrist[captured][end_row][end_col]
+        if piece[1] == 'P' and end_row in (0, 7):
+            piece = piece[0] + 'Q'
+        key ^= zobrist[piece][end_row][end_col] ^ chess_game.ZOBRIST_BLACK_TO_MOVE
+        board[start_row][start_col] = None
+        board[end_row][end_col] = piece
+        yield key
+
+
+class _Segment:
+    """One sorted run: header, then contiguous keys, game ids and plies."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, version, count = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION:
+            raise ValueError(f"{path} is not a version {SEGMENT_VERSION} index segment")
+        offset = SEGMENT_HEADER.size
+        self.keys = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(count,)) if count else np.empty(0, '<u8')
+        self.games = np.memmap(path, dtype='<u4', mode='r', offset=offset + 8 * count, shape=(count,)) if count else np.empty(0, '<u4')
+        self.plies = np.memmap(path, dtype='<u2', mode='r', offset=offset + 12 * count, shape=(count,)) if count else np.empty(0, '<u2')
+
+    @staticmethod
+    def write(path, keys, games, plies):
+        order = np.argsort(keys, kind='stable')
+        with open(path, 'wb') as f:
+            f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, len(keys)))
+            f.write(keys[order].astype('<u8').tobytes())
+            f.write(games[order].astype('<u4').tobytes())
+            f.write(plies[order].astype('<u2').tobytes())
+
+    def close(self):
+        # Unmaps the file, so it can be removed (on Windows an open mapping blocks the delete)
+        for name in ('keys', 'games', 'plies'):
+            mapping = getattr(getattr(self, name), '_mmap', None)
+            setattr(self, name, None)
+            if mapping is not None:
+                mapping.close()
+
+    def lookup(self, key):
+        low = np.searchsorted(self.keys, key, side='left')
+        high = np.searchsorted(self.keys, key, side='right')
+        return list(zip(self.games[low:high].tolist(), self.plies[low:high].tolist()))
+
+
+class PositionIndex:
+    def __init__(self, directory, segment_entries=DEFAULT_SEGMENT_ENTRIES):
+        self.directory = directory
+        self.segment_entries = segment_entries
+        self._meta_path = os.path.join(directory, 'meta.json')
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self._meta = json.load(f)
+        else:
+            self._meta = {'games_indexed': 0, 'segments': [], 'next_segment': 0}
+        self._segments = [_Segment(os.path.join(directory, name)) for name in self._meta['segments']]
+
+    @property
+    def games_indexed(self):
+        return self._meta['games_indexed']
+
+    def __len__(self):
+        return sum(len(segment.keys) for segment in self._segments)
+
+    def _save_meta(self):
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _add_segment(self, keys, games, plies, games_indexed):
+        name = f"segment_{self._meta['next_segment']:06d}.bin"
+        _Segment.write(os.path.join(self.directory, name), np.array(keys, dtype=np.uint64),
+                       np.array(games, dtype=np.uint32), np.array(plies, dtype=np.uint16))
+        # The segment is complete on disk before meta.json refers to it
+        self._meta['next_segment'] += 1
+        self._meta['segments'].append(name)
+        self._meta['games_indexed'] = games_indexed
+        self._save_meta()
+        self._segments.append(_Segment(os.path.join(self.directory, name)))
+
+    def update(self, archive):
+        """Indexes the archive games added since the last update; returns how many."""
+        first = self.games_indexed
+        keys, games, plies = [], [], []
+        for game_id in range(first, len(archive)):
+            for ply, key in enumerate(replay_keys(archive.header(game_id).start_fen, archive.moves(game_id))):
+                keys.append(key)
+                games.append(game_id)
+                plies.append(ply)
+            if len(keys) >= self.segment_entries:
+                self._add_segment(keys, games, plies, game_id + 1)
+                keys, games, plies = [], [], []
+        if keys:
+            self._add_segment(keys, games, plies, len(archive))
+        return len(archive) - first
+
+    def compact(self):
+        """Merges all segments into one."""
+        if len(self._segments) < 2:
+            return
+        old_names = self._meta['segments']
+        keys = np.concatenate([segment.keys for segment in self._segments])
+        games = np.concatenate([segment.games for segment in self._segments])
+        plies = np.concatenate([segment.plies for segment in self._segments])
+        for segment in self._segments:
+            segment.close()
+        self._meta['segments'] = []
+        self._segments = []
+        self._add_segment(keys, games, plies, self.games_indexed)
+        for name in old_names:
+            os.remove(os.path.join(self.directory, name))
+
+    def lookup(self, key):
+        """All (game id, ply) pairs where the position with this key occurred."""
+        hits = []
+        for segment in self._segments:
+            hits.extend(segment.lookup(key))
+        return sorted(hits)
+
+    def lookup_game(self, game):
+        """Lookup for the current position of a ``ChessGame``."""
+        return self.lookup(game.position_hash)
+
+    def continuations(self, key, archive):
+        """Counter of the encoded moves played from this position in the archive."""
+        played = Counter()
+        for game_id, ply in self.lookup(key):
+            moves = archive.moves(game_id)
+            if ply < len(moves):
+                played[moves[ply]] += 1
+        return played
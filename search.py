@@ -0,0 +1,396 @@
+"""Iterative deepening alpha-beta search over a ``ChessGame``, with pondering.
+
+The searcher only uses the ``ChessGame`` interface (generate_all_valid_moves,
+iter_captures/iter_quiet_moves, is_valid_move, make_move/undo_move,
+make_null_move/undo_null_move, evaluate_board, static_exchange,
+is_king_in_check, piece_squares, position_hash, is_repetition), so it does
+not import ``Chess game.py``. Scores are in ``evaluate_board`` units (pawns)
+from the point of view of the side to move.
+
+    searcher = Searcher()
+    result = searcher.search(game, SearchLimits(movetime=3.0))
+    result.move, result.pv
+
+A search can be stopped from another thread with ``searcher.stop()``: the
+flag is polled at every node, so the search unwinds at once and returns the
+best move of the last completed depth.
+
+Null-move pruning, late-move reductions, aspiration windows and static
+exchange move ordering/pruning each have a toggle, e.g.
+``Searcher(null_move=False)``; ``search_tuning.py`` measures them.
+
+With ``Searcher(cache=AnalysisCache(path))`` the root position is looked up
+on disk first: a stored result is yielded at once and iterative deepening
+resumes one ply deeper. Results at least ``cache.min_depth`` deep are stored
+when the search ends.
+
+``analyse`` streams the ``multipv`` best lines after every completed depth;
+closing the generator (or breaking out of the loop) cancels the search. From
+another thread, pass a ``searcher`` and call its ``stop()``: the generator
+then ends without finishing the current depth.
+
+    for result in analyse(fen_or_game, SearchLimits(movetime=10), multipv=3):
+        for line in result.lines:
+            print(result.depth, line.score, line.pv)
+"""
+import threading
+import time
+from collections import namedtuple
+
+MATE_SCORE = 100000
+MAX_DEPTH = 64
+EXACT, LOWER, UPPER = 0, 1, 2  # Transposition table bound types
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 2
+LMR_MIN_DEPTH = 2
+LMR_MIN_MOVES = 3 # Moves searched at full depth before quiet moves get reduced
+ASPIRATION_WINDOW = 1 # Pawns on each side of the previous score, quadrupled after a fail
+SEE_PRUNE_DEPTH = 2 # Captures losing material by static exchange are skipped this close to the horizon
+FEATURES = ['null_move', 'lmr', 'aspiration', 'see'] # Searcher toggles
+
+SearchLimits = namedtuple('SearchLimits', ['depth', 'movetime', 'nodes'], defaults=[None, None, None])
+AnalysisLine = namedtuple('AnalysisLine', ['score', 'pv'])
+SearchResult = namedtuple('SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed', 'pv', 'lines'],
+                          defaults=[None])
+
+
+class SearchStopped(Exception):
+    """Raised inside the search when a limit is reached or stop() was called."""
+
+
+class Searcher:
+    def __init__(self, tt_size=1_000_000, null_move=True, lmr=True, aspiration=True, see=True, cache=None):
+        self.tt = {} # position hash -> (depth, score, bound, best move)
+        self.tt_size = tt_size
+        self.cache = cache # analysis_cache.AnalysisCache or None
+        self.null_move = null_move
+        self.lmr = lmr
+        self.aspiration = aspiration
+        self.see = see
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.root_plies = 0
+        self.running = threading.Event()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def search(self, game, limits=SearchLimits()):
+        """Runs to the limits and returns the last SearchResult, or None without moves."""
+        result = None
+        for result in self.iterate(game, limits):
+            pass
+        if result is None:
+            moves = game.generate_all_valid_moves(game.current_turn)
+            if not moves:
+                return None
+            result = SearchResult(moves[0], 0, 0, self.nodes, time.perf_counter() - self.start_time, [moves[0]],
+                                  [AnalysisLine(0, [moves[0]])])
+        return result
+
+    def iterate(self, game, limits=SearchLimits(), multipv=1):
+        """Yields a SearchResult after every completed depth, ``lines`` holding the ``multipv`` best lines."""
+        self._stop.clear()
+        self.nodes = 0
+        self.start_time = time.perf_counter()
+        self.deadline = self.start_time + limits.movetime if limits.movetime else None
+        self.node_limit = limits.nodes
+        self.root_plies = len(game.position_history) # Repeats after this are draws inside the search line
+        self.running.set()
+        key = game.position_hash
+        result = None
+        try:
+            root_moves = game.generate_all_valid_moves(game.current_turn)
+            if not root_moves:
+                return
+            previous_score = None
+            first_depth = 1
+            if self.cache is not None and multipv == 1:
+                cached = self.cache.get(key)
+                if cached is not None and cached.move in root_moves: # Not a hash collision
+                    root_moves.sort(key=lambda move: move != cached.move)
+                    previous_score, first_depth = cached.score, cached.depth + 1
+                    result = SearchResult(cached.move, cached.score, cached.depth, 0,
+                                          time.perf_counter() - self.start_time, [cached.move],
+                                          [AnalysisLine(cached.score, [cached.move])])
+                    yield result
+                    if cached.depth >= (limits.depth or MAX_DEPTH) or abs(cached.score) >= MATE_SCORE - MAX_DEPTH:
+                        return
+            for depth in range(first_depth, (limits.depth or MAX_DEPTH) + 1):
+                try:
+                    if self.aspiration and multipv == 1 and previous_score is not None:
+                        scored = self._aspiration_root(game, root_moves, depth, previous_score)
+                    else:
+                        scored = self._search_root(game, root_moves, depth, multipv)
+                except SearchStopped:
+                    return
+                previous_score = scored[0][0]
+                # Next iteration searches the best moves first
+                order = {move: rank for rank, (_, move) in enumerate(scored)}
+                root_moves.sort(key=lambda move: order.get(move, len(order)))
+                lines = []
+                for score, move in scored[:multipv]:
+                    game.make_move(*move)
+                    lines.append(AnalysisLine(score, [move] + self.principal_variation(game, depth - 1)))
+                    game.undo_move()
+                best = lines[0]
+                result = SearchResult(best.pv[0], best.score, depth, self.nodes, time.perf_counter() - self.start_time,
+                                      best.pv, lines)
+                yield result
+                if all(abs(line.score) >= MATE_SCORE - MAX_DEPTH for line in lines):
+                    return # Forced mates found for every line, deeper iterations cannot change them
+        finally:
+            self.running.clear()
+            if (self.cache is not None and multipv == 1 and result is not None and result.nodes
+                    and result.depth >= self.cache.min_depth):
+                self.cache.put(key, result.depth, result.score, result.move)
+
+    def principal_variation(self, game, max_length):
+        """Follows the transposition table best moves from the current position."""
+        pv = []
+        while len(pv) < max_length:
+            entry = self.tt.get(game.position_hash)
+            if entry is None or entry[3] not in game.generate_all_valid_moves(game.current_turn):
+                break
+            pv.append(entry[3])
+            game.make_move(*entry[3])
+            if game.game_over:
+                break
+        for _ in pv:
+            game.undo_move()
+        return pv
+
+    def _check_limits(self):
+        if self._stop.is_set():
+            raise SearchStopped()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchStopped()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchStopped()
+
+    def _evaluate(self, game):
+        score = game.evaluate_board()
+        return score if game.current_turn == 'w' else -score
+
+    def _has_pieces(self, game):
+        """False for king and pawns only, where passing may be the best move (zugzwang)."""
+        return any(game.piece_squares[game.current_turn + kind] for kind in 'NBRQ')
+
+    def _staged_moves(self, game, tt_move):
+        """Yields (move, exchange score or None): the hash move, captures of the most valuable piece
+        first (with ``see``: winning and even captures by static exchange), quiet moves, then losing
+        captures. A stage is only generated once the previous one is used up, so a cutoff on the
+        hash move generates nothing else and a cutoff on a capture skips the quiet moves."""
+        board = game.board
+        color = game.current_turn
+        if tt_move is not None and game.is_valid_move(tt_move[0], tt_move[1], turn_color=color):
+            yield tt_move, None
+        captures = [move for move in game.iter_captures(color) if move != tt_move]
+        losing = []
+        if self.see:
+            for loss, move in sorted((-game.static_exchange(move[0], move[1]), move) for move in captures):
+                if loss > 0:
+                    losing.append((move, -loss))
+                else:
+                    yield move, -loss
+        else:
+            captures.sort(key=lambda move: (-game.get_piece_value(board[move[1][0]][move[1][1]]), move))
+            for move in captures:
+                yield move, None
+        for move in game.iter_quiet_moves(color):
+            if move != tt_move:
+                yield move, None
+        yield from losing
+
+    def _store(self, key, depth, score, bound, move):
+        if len(self.tt) >= self.tt_size:
+            self.tt.clear()
+        self.tt[key] = (depth, score, bound, move)
+
+    def _search_root(self, game, moves, depth, multipv, alpha=-MATE_SCORE - 1, beta=MATE_SCORE + 1):
+        """Returns [(score, move)] best first; the ``multipv`` best scores are exact
+        if they fall inside (alpha, beta).
+
+        Every move is searched with alpha at the current k-th best score, so a
+        move only gets an exact score when it enters the top ``multipv``.
+        """
+        self.nodes += 1
+        scored = []
+        for move in moves:
+            self._check_limits()
+            floor = max(alpha, scored[multipv - 1][0]) if len(scored) >= multipv else alpha
+            game.make_move(move[0], move[1])
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -floor, 1)
+            finally:
+                game.undo_move()
+            scored.append((score, move))
+            scored.sort(key=lambda item: -item[0]) # Stable: earlier (better ordered) moves win ties
+            if scored[0][0] >= beta:
+                break # Fail high, the caller searches again with a wider window
+        if alpha < scored[0][0] < beta:
+            self._store(game.position_hash, depth, scored[0][0], EXACT, scored[0][1])
+        return scored
+
+    def _aspiration_root(self, game, moves, depth, previous_score):
+        """Root search in a narrow window around the previous score, widened until the best score falls inside."""
+        delta = ASPIRATION_WINDOW
+        while True:
+            alpha, beta = previous_score - delta, previous_score + delta
+            if delta > 64 * ASPIRATION_WINDOW or abs(previous_score) >= MATE_SCORE - MAX_DEPTH:
+                alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+            scored = self._search_root(game, moves, depth, 1, alpha, beta)
+            if alpha < scored[0][0] < beta:
+                return scored
+            delta *= 4
+
+    def _negamax(self, game, depth, alpha, beta, ply, allow_null=True):
+        self.nodes += 1
+        self._check_limits()
+        if ply > 0:
+            if game.game_over:
+                # make_move decided the game: the side to move is mated or it is a draw
+                return 0 if game.winner == 'draw' else -MATE_SCORE + ply
+            if game.is_repetition(3, self.root_plies):
+                return 0
+        if depth <= 0:
+            return self._evaluate(game)
+
+        key = game.position_hash
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, bound, tt_move = entry
+            if ply > 0 and entry_depth >= depth and (
+                    bound == EXACT
+                    or (bound == LOWER and entry_score >= beta)
+                    or (bound == UPPER and entry_score <= alpha)):
+                return entry_score
+
+        in_check = (self.null_move or self.lmr or self.see) and game.is_king_in_check(game.current_turn)
+
+        # Null move: if passing still fails high at a reduced depth, a real move will too
+        if (self.null_move and allow_null and ply > 0 and depth >= NULL_MOVE_MIN_DEPTH and not in_check
+                and abs(beta) < MATE_SCORE - MAX_DEPTH and self._has_pieces(game)
+                and self._evaluate(game) >= beta):
+            game.make_null_move()
+            try:
+                score = -self._negamax(game, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1, False)
+            finally:
+                game.undo_null_move()
+            if score >= beta:
+                return beta
+
+        board = game.board
+        original_alpha = alpha
+        best_score, best_move = -MATE_SCORE - 1, None
+        for index, (move, exchange) in enumerate(self._staged_moves(game, tt_move)):
+            if (self.see and depth <= SEE_PRUNE_DEPTH and index > 0 and not in_check
+                    and exchange is not None and exchange < 0):
+                continue
+            # Late quiet moves are searched one ply shallower first, and again at full depth if they beat alpha
+            reduce = (self.lmr and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_MOVES and not in_check
+                      and board[move[1][0]][move[1][1]] is None and move != tt_move
+                      and not (board[move[0][0]][move[0][1]][1] == 'P' and move[1][0] in (0, 7)))
+            game.make_move(move[0], move[1])
+            try:
+                if reduce:
+                    score = -self._negamax(game, depth - 2, -alpha - 1, -alpha, ply + 1)
+                    if score > alpha:
+                        score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                else:
+                    score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.undo_move()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_move is None:
+            return 0 # No moves
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self._store(key, depth, best_score, bound, best_move)
+        return best_score
+
+
+def analyse(position, limits=SearchLimits(), multipv=1, searcher=None):
+    """Streams a SearchResult per completed depth for a ``ChessGame`` or a FEN string.
+    The game is searched in place and restored between results. ``searcher.stop()`` from
+    another thread cancels the running depth."""
+    if isinstance(position, str):
+        from game_loader import load_chess_game
+        game = load_chess_game().ChessGame()
+        game.load_fen(position)
+    else:
+        game = position
+    yield from (searcher or Searcher()).iterate(game, limits, multipv)
+
+
+class Ponderer:
+    """Searches the position after the predicted reply while the opponent thinks.
+
+    On a ponder hit the running search keeps its work and only gets a deadline;
+    on a miss it is stopped and its transposition table entries stay reusable.
+    """
+
+    def __init__(self, searcher):
+        self.searcher = searcher
+        self.predicted_move = None
+        self._thread = None
+        self._result = None
+
+    @property
+    def active(self):
+        return self._thread is not None
+
+    def start(self, game, predicted_move, limits):
+        """Starts pondering on a copy of ``game`` with ``predicted_move`` played."""
+        self.stop()
+        position = game.copy()
+        position.make_move(*predicted_move)
+        if position.game_over:
+            return
+        self.predicted_move = predicted_move
+        self.limits = limits
+        self._result = None
+        self._start_time = time.perf_counter()
+        # No deadline while pondering, hit() sets one; the depth and node limits still apply
+        self._thread = threading.Thread(target=self._run, args=(position, limits._replace(movetime=None)), daemon=True)
+        self._thread.start()
+
+    def _run(self, position, limits):
+        self._result = self.searcher.search(position, limits)
+
+    def _wait_until_running(self):
+        # The thread resets the deadline and stop flag when its search starts, only act after that
+        while self._thread.is_alive() and not self.searcher.running.wait(0.01):
+            pass
+
+    def hit(self):
+        """The predicted move was played: returns the result within the move time, counted from the start of pondering."""
+        self._wait_until_running()
+        if self.limits.movetime:
+            self.searcher.deadline = self._start_time + self.limits.movetime
+        elif self.limits.depth is None and self.limits.nodes is None:
+            self.searcher.stop()
+        self._thread.join()
+        self._thread = None
+        return self._result
+
+    def stop(self):
+        """Ponder miss (or shutdown): stops the background search."""
+        if self._thread is not None:
+            self._wait_until_running()
+            self.searcher.stop()
+            self._thread.join()
+            self._thread = None
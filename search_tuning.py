@@ -0,0 +1,125 @@
+"""Measures the search pruning features (null move, LMR, aspiration windows, SEE).
+
+Every configuration is compared with the plain alpha-beta search (all
+features off) on the benchmark positions:
+
+- fixed depth: nodes and time to finish the depth
+- fixed time: depth reached and nodes searched
+- self-play: a match against the plain search at a fixed move time, giving
+  an Elo difference (few games, so only large differences are meaningful)
+
+    python search_tuning.py --depth 3 --movetime 1 --games 20
+"""
+import argparse
+import json
+import math
+import time
+from multiprocessing import Pool
+
+from benchmark import POSITIONS
+from game_loader import load_chess_game
+from search import FEATURES, Searcher, SearchLimits
+
+CONFIGS = {'plain': {}, **{feature: {feature: True} for feature in FEATURES},
+           'all': {feature: True for feature in FEATURES}}
+DEFAULT_MAX_PLIES = 120
+
+
+def make_searcher(config):
+    return Searcher(**{feature: config.get(feature, False) for feature in FEATURES})
+
+
+def _position(fen):
+    game = load_chess_game().ChessGame()
+    game.load_fen(fen)
+    return game
+
+
+def fixed_depth(config, depth):
+    """{position: (nodes, seconds)} to complete ``depth`` with a fresh table."""
+    stats = {}
+    for name, fen in POSITIONS.items():
+        searcher = make_searcher(config)
+        start = time.perf_counter()
+        result = searcher.search(_position(fen), SearchLimits(depth=depth))
+        stats[name] = (result.nodes, round(time.perf_counter() - start, 3))
+    return stats
+
+
+def fixed_time(config, movetime):
+    """{position: (depth, nodes)} reached in ``movetime`` seconds."""
+    stats = {}
+    for name, fen in POSITIONS.items():
+        result = make_searcher(config).search(_position(fen), SearchLimits(movetime=movetime))
+        stats[name] = (result.depth, result.nodes)
+    return stats
+
+
+def play_game(args):
+    """Pool task: plays one game, returns 1, 0.5 or 0 for the configuration playing ``config_color``."""
+    config, config_color, fen, movetime, max_plies = args
+    game = _position(fen)
+    searchers = {config_color: make_searcher(config), 'b' if config_color == 'w' else 'w': make_searcher({})}
+    for _ in range(max_plies):
+        if game.game_over:
+            break
+        result = searchers[game.current_turn].search(game, SearchLimits(movetime=movetime))
+        if result is None:
+            break
+        game.make_move(*result.move)
+        kings = {color for color in 'wb' if game.find_king(color) is not None}
+        if len(kings) < 2:
+            return 1.0 if config_color in kings else 0.0 # Moves are pseudo-legal, a king can be taken
+    if game.winner in ('w', 'b'):
+        return 1.0 if game.winner == config_color else 0.0
+    return 0.5
+
+
+def elo_difference(score):
+    """Elo difference for an average score in [0, 1]."""
+    score = min(max(score, 0.01), 0.99)
+    return -400 * math.log10(1 / score - 1)
+
+
+def match(config, games, movetime, max_plies=DEFAULT_MAX_PLIES, workers=None):
+    """Score and Elo of ``config`` against the plain search, colors alternating over the positions."""
+    fens = [fen for name, fen in POSITIONS.items() if name != 'mated']
+    tasks = [(config, 'w' if i % 2 == 0 else 'b', fens[(i // 2) % len(fens)], movetime, max_plies)
+             for i in range(games)]
+    with Pool(workers) as pool:
+        scores = pool.map(play_game, tasks)
+    score = sum(scores) / len(scores)
+    return {'games': games, 'score': round(score, 3), 'elo': round(elo_difference(score))}
+
+
+def run(depth, movetime, games, max_plies=DEFAULT_MAX_PLIES, workers=None):
+    report = {}
+    for name, config in CONFIGS.items():
+        depth_stats = fixed_depth(config, depth)
+        time_stats = fixed_time(config, movetime)
+        report[name] = {
+            'fixed_depth': {'depth': depth, 'nodes': sum(nodes for nodes, _ in depth_stats.values()),
+                            'seconds': round(sum(seconds for _, seconds in depth_stats.values()), 3),
+                            'positions': depth_stats},
+            'fixed_time': {'movetime': movetime,
+                           'mean_depth': round(sum(d for d, _ in time_stats.values()) / len(time_stats), 2),
+                           'positions': time_stats},
+        }
+        if games and name != 'plain':
+            report[name]['match'] = match(config, games, movetime, max_plies, workers)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=3, help='fixed-depth comparison depth')
+    parser.add_argument('--movetime', type=float, default=1.0, help='seconds per search and per match move')
+    parser.add_argument('--games', type=int, default=0, help='match games per configuration, 0 to skip')
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES, help='match games are drawn after this')
+    parser.add_argument('--workers', type=int, default=None, help='match processes, default: all cores')
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.depth, args.movetime, args.games, args.max_plies, args.workers), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""Asyncio server hosting many headless ``ChessGame`` sessions in one process.
+
+Protocol: one JSON object per line in each direction. A request may carry an
+"id", echoed in its response, so one connection can pipeline requests for many
+games. Moves use coordinate notation ("e2e4"); the AI, if any, plays black
+(from a black-to-move "fen", "new" already returns its first move as "reply").
+
+    {"id": 1, "cmd": "new", "ai": 0}                      -> {"id": 1, "ok": true, "game": 7, "fen": "..."}
+    {"id": 2, "cmd": "moves", "game": 7}                  -> {"id": 2, "ok": true, "moves": ["a2a3", ...]}
+    {"id": 3, "cmd": "move", "game": 7, "move": "e2e4"}   -> {"id": 3, "ok": true, "reply": "e7e5", "fen": "...",
+                                                              "game_over": false, "winner": null}
+    {"id": 4, "cmd": "state", "game": 7}
+    {"id": 5, "cmd": "close", "game": 7}
+    errors                                                -> {"id": .., "ok": false, "error": "..."}
+
+Human moves are checked in the event loop; engine replies run in a process
+pool so a slow search never blocks other games.
+
+    python server.py --port 8765
+    python server.py --analysis-cache analysis.sqlite3     # level 3 results shared by all engine processes
+    python server.py --load-test --games 2000 --moves 10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis_cache import AnalysisCache
+from game_loader import load_chess_game
+from search import Searcher, SearchLimits
+
+DEFAULT_PORT = 8765
+ENGINE_MOVE_TIME = 1.0 # Seconds per move for AI level 3
+
+_searchers = {} # analysis cache path (or None) -> Searcher, one per engine process, shared by all its games
+
+
+def _move_to_str(game, move):
+    return game._coords_to_algebraic(move[0]) + game._coords_to_algebraic(move[1])
+
+
+def engine_move(fen, ai_level, movetime=ENGINE_MOVE_TIME, cache_path=None):
+    """Process pool task: the AI move for a position, or None."""
+    game = load_chess_game().ChessGame(ai_difficulty=ai_level)
+    game.load_fen(fen)
+    if ai_level == 3:
+        searcher = _searchers.get(cache_path)
+        if searcher is None:
+            cache = AnalysisCache(cache_path) if cache_path is not None else None
+            searcher = _searchers[cache_path] = Searcher(cache=cache)
+        result = searcher.search(game, SearchLimits(movetime=movetime))
+        return result.move if result else None
+    return getattr(game, f'get_ai_move_level_{ai_level}')()
+
+
+class GameSession:
+    __slots__ = ('game', 'ai_level', 'lock')
+
+    def __init__(self, game, ai_level):
+        self.game = game
+        self.ai_level = ai_level
+        self.lock = asyncio.Lock() # One move at a time per game
+
+
+class ChessServer:
+    def __init__(self, workers=None, engine_move_time=ENGINE_MOVE_TIME, analysis_cache=None):
+        self.sessions = {}
+        self.engine_move_time = engine_move_time
+        self.analysis_cache = analysis_cache # Path of the AnalysisCache database for level 3, or None
+        self._ids = itertools.count(1)
+        self._pool = ProcessPoolExecutor(workers or os.cpu_count())
+        self._server = None
+        self._connections = {} # handler task -> writer
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=1 << 16)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Closing the transports makes every handler read EOF and return
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        self._pool.shutdown(cancel_futures=True)
+
+    async def _handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        self._connections[asyncio.current_task()] = writer
+
+        async def respond(request):
+            response = await self.handle_request(request)
+            if isinstance(request, dict) and 'id' in request:
+                response['id'] = request['id']
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    request = {'cmd': None}
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def handle_request(self, request):
+        """Always returns a response: a bad request gets {"ok": false, "error": ...}, never an exception."""
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'request must be a JSON object'}
+        handler = getattr(self, f"_cmd_{request.get('cmd')}", None)
+        if handler is None:
+            return {'ok': False, 'error': f"unknown command {request.get('cmd')!r}"}
+        try:
+            return await handler(request)
+        except KeyError as e:
+            return {'ok': False, 'error': f"missing or unknown {e}"}
+        except Exception as e: # Malformed FEN, unhashable game id...: the client still gets an answer
+            return {'ok': False, 'error': f"bad request: {type(e).__name__}: {e}"}
+
+    def _state(self, session):
+        game = session.game
+        return {'ok': True, 'fen': game.get_fen(), 'turn': game.current_turn,
+                'game_over': game.game_over, 'winner': game.winner}
+
+    async def _cmd_new(self, request):
+        ai_level = request.get('ai')
+        if ai_level not in (None, 0, 1, 2, 3):
+            return {'ok': False, 'error': 'ai must be null or 0-3'}
+        game = load_chess_game().ChessGame(ai_difficulty=ai_level)
+        if request.get('fen'):
+            try:
+                game.load_fen(str(request['fen']))
+            except (KeyError, IndexError, ValueError):
+                return {'ok': False, 'error': f"invalid fen {request['fen']!r}"}
+        game_id = next(self._ids)
+        session = self.sessions[game_id] = GameSession(game, ai_level)
+        async with session.lock:
+            # The AI plays black: from a black-to-move FEN it moves first
+            reply = await self._engine_reply(session) if game.current_turn == 'b' else None
+        return dict(self._state(session), game=game_id, reply=reply)
+
+    async def _cmd_state(self, request):
+        return self._state(self.sessions[request['game']])
+
+    async def _cmd_moves(self, request):
+        game = self.sessions[request['game']].game
+        moves = game.generate_all_valid_moves(game.current_turn)
+        return {'ok': True, 'moves': [_move_to_str(game, move) for move in moves]}
+
+    async def _cmd_close(self, request):
+        del self.sessions[request['game']]
+        return {'ok': True}
+
+    async def _cmd_move(self, request):
+        session = self.sessions[request['game']]
+        game = session.game
+        async with session.lock:
+            move = game.parse_move(str(request.get('move', '')))
+            if game.game_over:
+                return {'ok': False, 'error': 'game is over'}
+            if move is None or not game.is_valid_move(move[0], move[1]):
+                return {'ok': False, 'error': f"illegal move {request.get('move')!r}"}
+            if session.ai_level is not None and game.current_turn != 'w':
+                return {'ok': False, 'error': 'not your turn'}
+            game.make_move(move[0], move[1])
+            reply = await self._engine_reply(session)
+            return dict(self._state(session), reply=reply)
+
+    async def _engine_reply(self, session):
+        """Plays the AI move in a worker process, if the session has an AI and the game goes on;
+        returns it as a string, or None."""
+        game = session.game
+        if session.ai_level is None or game.game_over:
+            return None
+        loop = asyncio.get_running_loop()
+        reply = await loop.run_in_executor(self._pool, engine_move, game.get_fen(), session.ai_level,
+                                           self.engine_move_time, self.analysis_cache)
+        if reply is None:
+            return None
+        reply = (tuple(reply[0]), tuple(reply[1]))
+        game.make_move(reply[0], reply[1])
+        return _move_to_str(game, reply)
+
+
+class ChessClient:
+    """Minimal stand-in client: pipelined JSON-line requests over one connection."""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+        return cls(reader, writer)
+
+    async def _read_responses(self):
+        while line := await self._reader.readline():
+            response = json.loads(line)
+            future = self._pending.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            future.set_exception(ConnectionError('server closed the connection'))
+
+    async def request(self, cmd, **fields):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(json.dumps(dict(fields, id=request_id, cmd=cmd)).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._reader_task.cancel()
+
+
+# --- Load test ---
+
+def session_memory(count=1000):
+    """Average traced bytes of a new GameSession."""
+    chess_game = load_chess_game()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [GameSession(chess_game.ChessGame(ai_difficulty=0), 0) for _ in range(count)]
+    size = (tracemalloc.get_traced_memory()[0] - before) / len(sessions)
+    tracemalloc.stop()
+    return size
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def load_test(games=1000, moves=10, connections=20, ai_level=0, workers=None, seed=0):
+    """Plays ``games`` concurrent random-move games against the server and returns the statistics."""
+    server = ChessServer(workers)
+    port = await server.start('127.0.0.1', 0)
+    clients = [await ChessClient.connect('127.0.0.1', port) for _ in range(connections)]
+    rng = random.Random(seed)
+    latencies = []
+    peak_sessions = 0
+
+    async def play(client):
+        nonlocal peak_sessions
+        game_id = (await client.request('new', ai=ai_level))['game']
+        peak_sessions = max(peak_sessions, len(server.sessions))
+        for _ in range(moves):
+            legal = (await client.request('moves', game=game_id))['moves']
+            if not legal:
+                break
+            start = time.perf_counter()
+            response = await client.request('move', game=game_id, move=rng.choice(legal))
+            latencies.append(time.perf_counter() - start)
+            if response.get('game_over'):
+                break
+        return game_id
+
+    start = time.perf_counter()
+    game_ids = await asyncio.gather(*(play(clients[i % connections]) for i in range(games)))
+    elapsed = time.perf_counter() - start
+    for game_id in game_ids:
+        await clients[0].request('close', game=game_id)
+    for client in clients:
+        await client.close()
+    await server.close()
+
+    latencies.sort()
+    return {
+        'games': games,
+        'peak_concurrent_games': peak_sessions,
+        'moves': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'moves_per_s': round(len(latencies) / elapsed, 1),
+        'session_kb': round(session_memory() / 1024, 2),
+        'latency_ms': {name: round(_percentile(latencies, fraction) * 1000, 2)
+                       for name, fraction in (('p50', 0.50), ('p90', 0.90), ('p99', 0.99), ('max', 1.0))},
+    }
+
+
+async def serve(host, port, workers, analysis_cache=None):
+    server = ChessServer(workers, analysis_cache=analysis_cache)
+    port = await server.start(host, port)
+    print(f"Serving on {host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless multi-game chess server (JSON lines over TCP).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help='engine processes, default: all cores')
+    parser.add_argument('--load-test', action='store_true', help='run a local load test instead of serving')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--moves', type=int, default=10, help='human moves per game in the load test')
+    parser.add_argument('--connections', type=int, default=20)
+    parser.add_argument('--ai-level', type=int, choices=[0, 1, 2, 3], default=0)
+    parser.add_argument('--analysis-cache', help='SQLite file caching the level 3 searches')
+    args = parser.parse_args(argv)
+    if args.load_test:
+        stats = asyncio.run(load_test(args.games, args.moves, args.connections, args.ai_level, args.workers))
+        print(json.dumps(stats, indent=2))
+    else:
+        asyncio.run(serve(args.host, args.port, args.workers, args.analysis_cache))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Spectator wall: many live ``ChessGame`` games tiled in one pygame window.
+
+Worker processes play the games and send move events through a queue:
+
+    ('start', tile, board)        new game on a tile: ChessGame.board rows, parsed by the worker
+    ('move', tile, start, end)    (row, col) squares, promotion to a queen as in make_move
+
+Each tile keeps its own board and only redraws the squares an event touched
+(plus the previous last-move highlight), and all tiles share one set of
+sprites scaled to the tile square size. ``--frames`` runs a fixed number of
+frames and prints frame time statistics (headless with SDL_VIDEODRIVER=dummy):
+
+    python spectator.py --tiles 36 --ai-level 1
+    SDL_VIDEODRIVER=dummy python spectator.py --tiles 64 --delay 0 --frames 600
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import queue
+import random
+import time
+
+import pygame
+
+from asset_cache import load_sprites
+from game_loader import load_chess_game
+
+WINDOW_SIZE = 1024
+TILE_GAP = 4
+FPS = 60
+MAX_EVENTS_PER_FRAME = 512 # Backlog beyond this waits for the next frame
+MAX_PLIES = 300 # Games still running after this are restarted
+
+BACKGROUND = (40, 40, 40)
+WHITE = (235, 235, 208)
+BLACK = (119, 148, 85)
+LAST_MOVE_WHITE = (246, 246, 130)
+LAST_MOVE_BLACK = (186, 202, 68)
+PIECE_CODES = [color + kind for color in 'wb' for kind in 'PNBRQK']
+
+
+class Tile:
+    """One board of the wall, with the squares to redraw on the next frame."""
+    ALL_SQUARES = frozenset((r, c) for r in range(8) for c in range(8))
+
+    def __init__(self, x, y, square_size):
+        self.x = x
+        self.y = y
+        self.square_size = square_size
+        self.board = [[None] * 8 for _ in range(8)]
+        self.last_move = ()
+        self.dirty = set(self.ALL_SQUARES)
+
+    def start(self, board):
+        self.board = [list(row) for row in board]
+        self.last_move = ()
+        self.dirty |= self.ALL_SQUARES
+
+    def move(self, start, end):
+        (start_row, start_col), (end_row, end_col) = start, end
+        piece = self.board[start_row][start_col]
+        if piece is None:
+            return # Out of sync, the next 'start' event fixes it
+        if piece[1] == 'P' and end_row in (0, 7):
+            piece = piece[0] + 'Q'
+        self.board[start_row][start_col] = None
+        self.board[end_row][end_col] = piece
+        self.dirty.update(self.last_move)
+        self.last_move = (tuple(start), tuple(end))
+        self.dirty.update(self.last_move)
+
+    def draw(self, surface, sprites, rects):
+        """Redraws the dirty squares and appends their rects."""
+        size = self.square_size
+        for row, col in self.dirty:
+            rect = pygame.Rect(self.x + col * size, self.y + row * size, size, size)
+            light = (row + col) % 2 == 0
+            if (row, col) in self.last_move:
+                surface.fill(LAST_MOVE_WHITE if light else LAST_MOVE_BLACK, rect)
+            else:
+                surface.fill(WHITE if light else BLACK, rect)
+            piece = self.board[row][col]
+            if piece is not None:
+                surface.blit(sprites[piece], rect)
+            rects.append(rect)
+        self.dirty.clear()
+
+
+class SpectatorWall:
+    def __init__(self, tiles=16, window_size=WINDOW_SIZE):
+        self.columns = math.ceil(math.sqrt(tiles))
+        self.rows = math.ceil(tiles / self.columns)
+        self.square_size = max(1, (window_size // self.columns - TILE_GAP) // 8)
+        pitch = self.square_size * 8 + TILE_GAP
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.columns * pitch - TILE_GAP, self.rows * pitch - TILE_GAP))
+        pygame.display.set_caption(f"Chess - {tiles} games")
+        self.screen.fill(BACKGROUND)
+        pygame.display.flip()
+        # One sprite set for every tile
+        paths = {piece: f"images/{piece}.png" for piece in PIECE_CODES}
+        scaled = load_sprites(paths.values(), self.square_size)
+        self.sprites = {piece: scaled[path] for piece, path in paths.items()}
+        self.tiles = [Tile((i % self.columns) * pitch, (i // self.columns) * pitch, self.square_size)
+                      for i in range(tiles)]
+        self.frame_times = []
+        self.events_applied = 0
+
+    def apply(self, event):
+        kind, tile, *args = event
+        getattr(self.tiles[tile], kind)(*args)
+        self.events_applied += 1
+
+    def draw(self):
+        rects = []
+        for tile in self.tiles:
+            if tile.dirty:
+                tile.draw(self.screen, self.sprites, rects)
+        if rects:
+            pygame.display.update(rects)
+
+    def run(self, events, frames=None):
+        """Shows the games fed through the ``events`` queue until the window closes (or ``frames`` frames)."""
+        clock = pygame.time.Clock()
+        running = True
+        while running and (frames is None or len(self.frame_times) < frames):
+            start = time.perf_counter()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+            for _ in range(MAX_EVENTS_PER_FRAME):
+                try:
+                    self.apply(events.get_nowait())
+                except queue.Empty:
+                    break
+            self.draw()
+            self.frame_times.append(time.perf_counter() - start)
+            clock.tick(FPS)
+
+    def stats(self):
+        times = sorted(self.frame_times)
+        if not times:
+            return {}
+        percentile = lambda fraction: round(times[min(len(times) - 1, int(fraction * len(times)))] * 1000, 2)
+        return {'tiles': len(self.tiles), 'frames': len(times), 'events': self.events_applied,
+                'frame_ms': {'p50': percentile(0.5), 'p99': percentile(0.99), 'max': percentile(1.0)}}
+
+
+def play_games(events, tiles, ai_level, delay, seed, stop):
+    """Worker process: plays one game per tile, round robin, and sends the moves to ``events``."""
+    events.cancel_join_thread() # Exit without flushing events nobody will read
+    random.seed(seed)
+    chess_game = load_chess_game()
+    games = {}
+    while not stop.is_set():
+        for tile in tiles:
+            game = games.get(tile)
+            if game is None or game.game_over or len(game.move_log) >= MAX_PLIES:
+                game = games[tile] = chess_game.ChessGame(ai_difficulty=ai_level)
+                events.put(('start', tile, [row[:] for row in game.board])) # Copied: the queue pickles it later
+                continue
+            move = getattr(game, f'get_ai_move_level_{ai_level}')()
+            if move is None:
+                game.game_over = True
+                continue
+            game.make_move(move[0], move[1])
+            events.put(('move', tile, move[0], move[1]))
+        if delay:
+            stop.wait(delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watch many engine games at once.')
+    parser.add_argument('--tiles', type=int, default=16, help='number of games (16-64 fit the window)')
+    parser.add_argument('--ai-level', type=int, choices=[0, 1, 2], default=0)
+    parser.add_argument('--delay', type=float, default=0.5, help='seconds between the moves of a game')
+    parser.add_argument('--workers', type=int, default=None, help='game processes, default: all cores')
+    parser.add_argument('--window', type=int, default=WINDOW_SIZE, help='window width in pixels')
+    parser.add_argument('--frames', type=int, default=None, help='stop after this many frames and print statistics')
+    args = parser.parse_args(argv)
+
+    workers = min(args.workers or multiprocessing.cpu_count(), args.tiles)
+    events = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=play_games, daemon=True,
+                                         args=(events, list(range(i, args.tiles, workers)), args.ai_level,
+                                               args.delay, i, stop))
+                 for i in range(workers)]
+    wall = SpectatorWall(args.tiles, args.window)
+    for process in processes:
+        process.start()
+    try:
+        wall.run(events, args.frames)
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=5)
+        pygame.quit()
+    if args.frames:
+        print(json.dumps(wall.stats()))
+
+
+if __name__ == '__main__':
+    main()
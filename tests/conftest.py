@@ -0,0 +1,53 @@
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+from game_loader import load_chess_game
+
+# Middlegame and endgame positions next to the ones random play reaches
+FENS = [
+    'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w - - 4 4',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b - - 0 1',
+    '4k3/1P6/8/8/8/8/6p1/4K3 w - - 0 1',
+]
+
+
+@pytest.fixture(scope='session')
+def chess_game():
+    return load_chess_game()
+
+
+def play_random(game, rng, plies):
+    """Plays up to ``plies`` random moves of ``game`` (stops when it is over)."""
+    for _ in range(plies):
+        moves = game.generate_all_valid_moves(game.current_turn)
+        if game.game_over or not moves:
+            break
+        game.make_move(*rng.choice(moves))
+    return game
+
+
+@pytest.fixture
+def positions(chess_game):
+    """Games at a spread of positions: the FENS and random games stopped at various plies."""
+    rng = random.Random(2024)
+    games = []
+    for fen in FENS:
+        game = chess_game.ChessGame()
+        game.load_fen(fen)
+        games.append(game)
+    for plies in (0, 7, 20, 45, 80):
+        for _ in range(3):
+            games.append(play_random(chess_game.ChessGame(), rng, plies))
+    return games
+
+
+@pytest.fixture
+def played_game(chess_game):
+    """A game after 60 random plies (fewer if it ended)."""
+    return play_random(chess_game.ChessGame(), random.Random(7), 60)
@@ -0,0 +1,62 @@
+"""Persistent analysis cache (user-044)."""
+from analysis_cache import EVICT_INTERVAL, AnalysisCache, CacheEntry
+from search import Searcher, SearchLimits
+
+E4 = ((6, 4), (4, 4))
+D4 = ((6, 3), (4, 3))
+
+
+def test_get_put_keeps_the_deepest(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache.sqlite3'))
+    key = (1 << 64) - 5 # Unsigned hashes above 2**63 are stored as signed integers
+    assert cache.get(key) is None
+    cache.put(key, 5, 0.5, E4)
+    assert cache.get(key) == CacheEntry(5, 0.5, E4)
+    cache.put(key, 3, -1.0, D4) # Shallower: ignored
+    assert cache.get(key) == CacheEntry(5, 0.5, E4)
+    cache.put(key, 6, 1.0, D4)
+    assert cache.get(key) == CacheEntry(6, 1.0, D4)
+    assert (cache.hits, cache.misses) == (3, 1)
+    cache.close()
+    # Another instance (or process) sees the same file
+    reopened = AnalysisCache(str(tmp_path / 'cache.sqlite3'))
+    assert reopened.get(key) == CacheEntry(6, 1.0, D4) and len(reopened) == 1
+    reopened.clear()
+    assert len(reopened) == 0
+    reopened.close()
+
+
+def test_eviction_drops_the_least_recently_used(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache.sqlite3'), max_entries=100)
+    for key in range(1, EVICT_INTERVAL):
+        cache.put(key, 4, 0.0, E4)
+    assert cache.get(1) is not None # Used again: survives the eviction
+    cache.put(EVICT_INTERVAL, 4, 0.0, E4)
+    assert len(cache) == 90
+    assert cache.get(1) is not None and cache.get(EVICT_INTERVAL) is not None
+    cache.close()
+
+
+def test_hits_are_written_in_batches(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = AnalysisCache(path)
+    cache.put(1, 4, 0.0, E4)
+    reader = AnalysisCache(path)
+    used = reader._connection().execute('SELECT used FROM analysis').fetchone()[0]
+    assert cache.get(1) is not None
+    # The hit is only noted in memory until the next size check or close
+    assert reader._connection().execute('SELECT used FROM analysis').fetchone()[0] == used
+    cache.close()
+    assert reader._connection().execute('SELECT used FROM analysis').fetchone()[0] > used
+    reader.close()
+
+
+def test_searcher_stores_and_reuses(tmp_path, chess_game):
+    cache = AnalysisCache(str(tmp_path / 'cache.sqlite3'), min_depth=2)
+    game = chess_game.ChessGame()
+    stored = Searcher(cache=cache).search(game, SearchLimits(depth=2))
+    assert cache.get(game.position_hash) == CacheEntry(2, stored.score, stored.move)
+    # A new searcher starts from the stored result and does not search that depth again
+    first = next(Searcher(cache=cache).iterate(game, SearchLimits(depth=3)))
+    assert (first.depth, first.move, first.nodes) == (2, stored.move, 0)
+    cache.close()
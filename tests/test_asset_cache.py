@@ -0,0 +1,53 @@
+"""Sprite bundle and font caches (user-036)."""
+import os
+import threading
+import time
+
+import pygame
+
+import asset_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES = [os.path.join(ROOT, 'images', name) for name in ('wP.png', 'bK.png')]
+
+
+def test_bundle_is_reused_and_rebuilt_when_corrupt(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_cache, 'CACHE_DIR', str(tmp_path))
+    sprites = asset_cache.load_sprites(IMAGES, 32)
+    assert sorted(sprites) == sorted(IMAGES)
+    assert all(sprite.get_size() == (32, 32) for sprite in sprites.values())
+    bundle = tmp_path / 'sprites_32.bin'
+    sources = asset_cache._sources(sorted(IMAGES))
+    assert asset_cache._read_bundle(str(bundle), sources, 32) is not None
+
+    data = bundle.read_bytes()
+    header = asset_cache.BUNDLE_HEADER.size
+    for corrupt in (data[:header] + b'\xff' + data[header + 1:], data[:-10]):
+        bundle.write_bytes(corrupt)
+        assert asset_cache._read_bundle(str(bundle), sources, 32) is None
+        rebuilt = asset_cache.load_sprites(IMAGES, 32)
+        assert [pygame.image.tobytes(rebuilt[path], 'RGBA') for path in IMAGES] == \
+            [pygame.image.tobytes(sprites[path], 'RGBA') for path in IMAGES]
+        assert bundle.read_bytes() == data
+
+
+def test_font_scan_runs_in_the_background(tmp_path, monkeypatch):
+    font_file = tmp_path / 'fonts.json'
+    monkeypatch.setattr(asset_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(asset_cache, 'FONT_FILE', str(font_file))
+    monkeypatch.setattr(asset_cache, '_fonts', {})
+    monkeypatch.setattr(asset_cache, '_font_lookups', set())
+    default_font = os.path.join(os.path.dirname(pygame.__file__), pygame.font.get_default_font())
+    scanning = threading.Event()
+    monkeypatch.setattr(pygame.font, 'match_font', lambda name, bold=False: scanning.wait(5) and default_font)
+
+    # The scan is still running: get_font returns at once with the default font
+    assert asset_cache.get_font('Arial', 20) is not None
+    assert asset_cache.get_font('Arial', 20) is asset_cache.get_font('Arial', 20)
+    assert not font_file.exists()
+    scanning.set()
+    deadline = time.monotonic() + 5
+    while not font_file.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert asset_cache._font_paths() == {'Arial|0': default_font}
+    assert asset_cache.get_font('Arial', 30) is not None # Next lookup reads fonts.json
@@ -0,0 +1,33 @@
+"""NumPy batch evaluation (user-027)."""
+import numpy as np
+import pytest
+
+from batch_eval import evaluate_batch, pack_boards, pack_fens
+
+
+def test_material_matches_evaluate_board(positions):
+    material, positional = evaluate_batch(pack_boards([game.board for game in positions]), chunk_size=4)
+    assert material.tolist() == [game.evaluate_board() for game in positions]
+    assert np.isfinite(positional).all()
+
+
+def test_pack_fens_matches_pack_boards(positions):
+    boards = [game.board for game in positions]
+    fens = [game.get_fen() for game in positions]
+    assert np.array_equal(pack_fens(fens), pack_boards(boards))
+
+
+def test_planes_one_piece_per_square(positions):
+    planes = pack_boards([game.board for game in positions])
+    assert planes.shape == (len(positions), 12, 8, 8)
+    assert planes.sum(axis=1).max() == 1
+
+
+@pytest.mark.parametrize('placement', ['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP',  # 7 ranks
+                                       'rnbqkbnr/pppppppp/9/7/8/8/PPPPPPPP/RNBQKBNR',  # 9 + 7 squares
+                                       'rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR'])
+def test_pack_fens_names_the_bad_fen(placement):
+    fen = f'{placement} w KQkq - 0 1'
+    with pytest.raises(ValueError, match='8 ranks of 8 squares') as error:
+        pack_fens(['8/8/8/8/8/8/8/8 w - - 0 1', fen])
+    assert repr(fen) in str(error.value)
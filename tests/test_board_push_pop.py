@@ -0,0 +1,52 @@
+"""Board.push/pop (user-032)."""
+import random
+
+from board import Board
+
+
+def snapshot(board):
+    return [[(type(piece), piece.color, piece.position) if piece is not None else None for piece in row]
+            for row in board.board], board.turn
+
+
+def legal_moves(board):
+    return [(piece.position, end) for row in board.board for piece in row
+            if piece is not None and piece.color == board.turn for end in piece.get_legal_moves(board.board)]
+
+
+def test_push_pop_restores_capture():
+    board = Board()
+    board.load_fen('4k3/8/8/3q4/8/8/8/3QK3 w - - 0 1')
+    before = snapshot(board)
+    black_queen = board.board[4][3]
+    captured = board.push(((0, 3), (4, 3)))
+    assert captured is black_queen
+    assert board.turn == 'black'
+    assert board.board[4][3].color == 'white' and board.board[4][3].position == (4, 3)
+    assert board.board[0][3] is None
+    assert board.pop() == ((0, 3), (4, 3))
+    assert board.board[4][3] is black_queen
+    assert snapshot(board) == before
+
+
+def test_push_pop_random_line():
+    rng = random.Random(13)
+    board = Board()
+    snapshots = []
+    for _ in range(60):
+        moves = legal_moves(board)
+        if not moves:
+            break
+        snapshots.append(snapshot(board))
+        board.push(rng.choice(moves))
+    while snapshots:
+        board.pop()
+        assert snapshot(board) == snapshots.pop()
+    assert snapshot(board) == snapshot(Board())
+
+
+def test_load_fen_side_to_move():
+    board = Board()
+    board.load_fen('4k3/8/8/8/8/8/8/4K3 b - - 0 1')
+    assert board.turn == 'black'
+    assert board.find_king('white') == (0, 4) and board.find_king('black') == (7, 4)
@@ -0,0 +1,26 @@
+"""Vectorised dataset features (user-028)."""
+import random
+
+import numpy as np
+
+from batch_eval import board_codes
+from dataset import RECORD_DTYPE, batch_features, play_game
+
+
+def test_features_match_chess_game(positions):
+    mobility, in_check = batch_features(board_codes([game.board for game in positions]))
+    for i, game in enumerate(positions):
+        assert list(mobility[i]) == [len(game.generate_all_valid_moves(color)) for color in 'wb']
+        assert list(in_check[i]) == [game.is_king_in_check(color) for color in 'wb']
+
+
+def test_play_game_yields_every_ply():
+    plies = [ply for _, _, ply in play_game(random.Random(1), max_plies=30)]
+    assert plies == list(range(len(plies)))
+    assert 0 < len(plies) <= 30
+
+
+def test_record_layout():
+    records = np.zeros(2, dtype=RECORD_DTYPE)
+    assert records['board'].shape == (2, 64)
+    assert records['mobility'].shape == records['in_check'].shape == (2, 2)
@@ -0,0 +1,63 @@
+"""Move encoding and the game archive (user-029)."""
+import pytest
+
+from game_archive import PROMOTIONS, GameArchive, decode_move, encode_move, encode_move_log
+
+
+def test_encode_decode_every_move():
+    squares = [(r, c) for r in range(8) for c in range(8)]
+    codes = set()
+    for start in squares:
+        for end in squares:
+            for promotion in PROMOTIONS:
+                code = encode_move(start, end, promotion)
+                assert 0 <= code < 1 << 16
+                assert decode_move(code) == (start, end, promotion)
+                codes.add(code)
+    assert len(codes) == 64 * 64 * len(PROMOTIONS)
+
+
+def test_round_trip(tmp_path, played_game, chess_game):
+    fen = '4k3/1P6/8/8/8/8/6p1/4K3 w - - 0 1'
+    promoting = chess_game.ChessGame()
+    promoting.load_fen(fen)
+    promoting.make_move((1, 1), (0, 1))
+    promoting.make_move((6, 6), (7, 6))
+
+    with GameArchive(str(tmp_path / 'games.bin')) as archive:
+        assert archive.append_game(played_game) == 0
+        assert archive.append([], result='draw') == 1
+        assert archive.append_game(promoting, start_fen=fen) == 2
+        assert len(archive) == 3
+        assert list(archive.moves(0)) == list(encode_move_log(played_game.move_log))
+        assert list(archive[1]) == []
+        assert archive.header(1) == (0, 'draw', None)
+        assert archive.header(2) == (2, None, fen)
+        assert [decode_move(code) for code in archive.moves(2)] == [((1, 1), (0, 1), 'Q'), ((6, 6), (7, 6), 'Q')]
+        replayed = archive.replay(0)
+        assert replayed.board == played_game.board
+        assert archive.replay(2).board == promoting.board
+        with pytest.raises(IndexError):
+            archive.moves(3)
+
+
+def test_append_after_reading_and_reopen(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    with GameArchive(path) as archive:
+        archive.append([1, 2, 3])
+        first = archive.moves(0) # Keeps the old mapping alive across the remap
+        archive.append([4, 5], result='w')
+        assert list(archive.moves(1)) == [4, 5]
+        assert list(first) == [1, 2, 3]
+        del first
+    with GameArchive(path) as archive:
+        assert len(archive) == 2
+        assert archive.header(1).result == 'w'
+        assert list(archive.moves(0)) == [1, 2, 3]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not an archive')
+    with pytest.raises(ValueError):
+        GameArchive(str(path))
@@ -0,0 +1,59 @@
+"""Mate-in-N solver (user-039)."""
+import time
+
+import pytest
+
+from mate_solver import MateSolver
+from search import SearchLimits
+
+
+@pytest.mark.parametrize('fen, mate_in, first_move', [
+    ('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', 1, ((7, 0), (0, 0))), # Back rank
+    ('7k/8/8/8/8/8/R7/1R4K1 w - - 0 1', 2, ((6, 0), (1, 0))), # Rook roller
+    ('1r5k/8/8/8/8/8/5PPP/6K1 b - - 0 1', 1, ((0, 1), (7, 1))), # Black mates
+])
+def test_finds_the_shortest_mate(chess_game, fen, mate_in, first_move):
+    game = chess_game.ChessGame()
+    game.load_fen(fen)
+    result = MateSolver().solve(game, SearchLimits(depth=3))
+    assert result.complete and result.mate_in == mate_in
+    assert result.line[0] == first_move
+    assert len(result.line) == 2 * mate_in - 1
+    assert game.get_fen() == fen # Searched in place and restored
+    for move in result.line:
+        assert game.is_valid_move(*move)
+        game.make_move(*move)
+    # Mated: whatever the defender plays, its king can be taken
+    defender = game.current_turn
+    for reply in game.generate_all_valid_moves(defender):
+        game.make_move(*reply)
+        king = game.find_king(defender)
+        assert any(end == king for _, end in game.generate_all_valid_moves(game.current_turn))
+        game.undo_move()
+
+
+def test_no_mate(chess_game):
+    result = MateSolver().solve('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1', SearchLimits(depth=2))
+    assert result.complete and result.mate_in is None and result.line == []
+
+
+def test_node_limit_stops_the_search():
+    result = MateSolver().solve('7k/8/8/8/8/8/R7/1R4K1 w - - 0 1', SearchLimits(depth=3, nodes=5))
+    assert not result.complete and result.mate_in is None
+
+
+def test_stop_before_solve_is_kept():
+    solver = MateSolver()
+    solver.stop()
+    result = solver.solve('7k/8/8/8/8/8/R7/1R4K1 w - - 0 1', SearchLimits(depth=3))
+    assert not result.complete and result.mate_in is None
+
+
+def test_gui_mate_search_cancel(chess_game):
+    game = chess_game.ChessGame()
+    search = chess_game.MateSearch(game)
+    search.cancel() # Before or just after the thread starts solving
+    deadline = time.monotonic() + 2
+    while not search.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert search.done and search.result is None
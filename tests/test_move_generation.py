@@ -0,0 +1,51 @@
+"""Staged move generation (user-045)."""
+
+
+def brute_force_moves(game, color):
+    squares = [(r, c) for r in range(8) for c in range(8)]
+    return sorted((start, end) for start in squares for end in squares
+                  if game.is_valid_move(start, end, turn_color=color))
+
+
+def test_generate_all_valid_moves_matches_is_valid_move(positions):
+    for game in positions:
+        for color in 'wb':
+            assert game.generate_all_valid_moves(color) == brute_force_moves(game, color)
+
+
+def test_iter_moves_stages(positions):
+    for game in positions:
+        color = game.current_turn
+        moves = list(game.iter_moves(color))
+        captures = list(game.iter_captures(color))
+        quiet = list(game.iter_quiet_moves(color))
+        assert moves == captures + quiet
+        assert all(game.board[end[0]][end[1]] is not None for _, end in captures)
+        assert all(game.board[end[0]][end[1]] is None for _, end in quiet)
+        assert sorted(moves) == game.generate_all_valid_moves(color)
+
+
+def test_iter_moves_hash_move_first_and_once(positions):
+    for game in positions:
+        color = game.current_turn
+        all_moves = game.generate_all_valid_moves(color)
+        if not all_moves:
+            continue
+        hash_move = all_moves[len(all_moves) // 2]
+        moves = list(game.iter_moves(color, hash_move))
+        assert moves[0] == hash_move
+        assert sorted(moves) == all_moves
+        # A hash move that is not valid here (another position's) is skipped
+        assert sorted(game.iter_moves(color, ((4, 4), (4, 4)))) == all_moves
+
+
+def test_iter_moves_survives_make_and_undo_between_moves(positions):
+    for game in positions:
+        color = game.current_turn
+        expected = list(game.iter_moves(color))
+        seen = []
+        for move in game.iter_moves(color):
+            seen.append(move)
+            game.make_move(*move)
+            game.undo_move()
+        assert seen == expected
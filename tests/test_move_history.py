@@ -0,0 +1,48 @@
+"""Move history snapshots (user-042)."""
+import pytest
+
+from move_history import MoveHistory
+
+
+def boards_by_ply(chess_game, move_log):
+    game = chess_game.ChessGame()
+    boards = [[row[:] for row in game.board]]
+    for start, end, _, _ in move_log:
+        game.make_move(start, end)
+        boards.append([row[:] for row in game.board])
+    return boards
+
+
+@pytest.mark.parametrize('interval', [1, 4, 16])
+def test_board_at_every_ply(chess_game, played_game, interval):
+    history = MoveHistory.for_game(played_game, interval)
+    expected = boards_by_ply(chess_game, played_game.move_log)
+    assert len(history) == len(played_game.move_log)
+    for ply, board in enumerate(expected):
+        assert history.board_at(ply) == board
+    # Out of range plies are clamped
+    assert history.board_at(-1) == expected[0]
+    assert history.board_at(len(expected) + 5) == expected[-1]
+
+
+def test_sync_after_undo_and_new_moves(chess_game, played_game):
+    history = MoveHistory.for_game(played_game, 4)
+    for _ in range(10):
+        played_game.undo_move()
+    moves = played_game.generate_all_valid_moves(played_game.current_turn)
+    played_game.make_move(*moves[0])
+    history.sync(played_game.move_log)
+    assert len(history) == len(played_game.move_log)
+    expected = boards_by_ply(chess_game, played_game.move_log)
+    for ply, board in enumerate(expected):
+        assert history.board_at(ply) == board
+
+
+def test_promotion_is_reverted(chess_game):
+    game = chess_game.ChessGame()
+    game.load_fen('4k3/1P6/8/8/8/8/8/4K3 w - - 0 1')
+    start = [row[:] for row in game.board]
+    game.make_move((1, 1), (0, 1))
+    history = MoveHistory.for_game(game, 2)
+    assert history.board_at(0) == start
+    assert history.board_at(1)[0][1] == 'wQ'
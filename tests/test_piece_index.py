@@ -0,0 +1,97 @@
+"""Piece indexes of ChessGame and Board (user-046)."""
+import random
+
+from board import PIECE_ORDER, Board
+from mate_solver import MateSolver
+from queen import Queen
+
+
+def rebuilt_index(game):
+    index = {color + kind: set() for color in 'wb' for kind in 'PNBRQK'}
+    for r, row in enumerate(game.board):
+        for c, piece in enumerate(row):
+            if piece is not None:
+                index[piece].add((r, c))
+    return index
+
+
+def test_piece_squares_follow_make_undo_and_copy(chess_game):
+    rng = random.Random(3)
+    game = chess_game.ChessGame()
+    for _ in range(120):
+        moves = game.generate_all_valid_moves(game.current_turn)
+        if game.game_over or not moves:
+            break
+        game.make_move(*rng.choice(moves))
+        assert game.piece_squares == rebuilt_index(game)
+        # A copy has its own index: changing it leaves the game's alone
+        copy = game.copy()
+        copy.undo_move()
+        assert copy.piece_squares == rebuilt_index(copy)
+        assert game.piece_squares == rebuilt_index(game)
+    while game.undo_move():
+        assert game.piece_squares == rebuilt_index(game)
+    assert game.board == chess_game.ChessGame().board
+
+
+def test_iter_pieces_in_board_order(positions):
+    for game in positions:
+        for color in 'wb':
+            expected = [((r, c), piece) for r, row in enumerate(game.board) for c, piece in enumerate(row)
+                        if piece is not None and piece[0] == color]
+            assert list(game.iter_pieces(color)) == expected
+
+
+def test_mate_solver_play_unplay_keep_index_and_hash(chess_game, positions):
+    solver = MateSolver()
+    solver._zobrist, solver._black_to_move = chess_game.ZOBRIST_PIECES, chess_game.ZOBRIST_BLACK_TO_MOVE
+    for game in positions:
+        board = [row[:] for row in game.board]
+        key, turn = game.position_hash, game.current_turn
+        for move in game.generate_all_valid_moves(turn):
+            undo = solver._play(game, move)
+            assert game.piece_squares == rebuilt_index(game)
+            assert game.position_hash == game.zobrist_hash()
+            solver._unplay(game, undo)
+        assert (game.board, game.position_hash, game.current_turn) == (board, key, turn)
+        assert game.piece_squares == rebuilt_index(game)
+
+
+def board_index(board):
+    index = {color: {cls: set() for cls in PIECE_ORDER} for color in ('white', 'black')}
+    for row in board.board:
+        for piece in row:
+            if piece is not None:
+                index[piece.color][type(piece)].add(piece)
+    return index
+
+
+def test_board_index_and_iter_moves_follow_push_pop():
+    rng = random.Random(5)
+    board = Board()
+    for _ in range(80):
+        moves = list(board.iter_moves(board.turn))
+        expected = [(piece.position, end) for piece in board.iter_pieces(board.turn)
+                    for end in piece.get_legal_moves(board.board)]
+        assert sorted(moves) == sorted(expected)
+        if not moves or board.find_king('white') is None or board.find_king('black') is None:
+            break
+        board.push(rng.choice(moves))
+        assert board.pieces == board_index(board)
+    while board._undo_stack:
+        board.pop()
+        assert board.pieces == board_index(board)
+    assert board.find_king('white') == (0, 4) and board.find_king('black') == (7, 4)
+
+
+
+def test_board_index_after_capture():
+    board = Board()
+    board.load_fen('4k3/8/8/3q4/8/8/8/3QK3 w - - 0 1')
+    black_queen = board.board[4][3]
+    board.push(((0, 3), (4, 3)))
+    assert board.pieces['black'][Queen] == set()
+    assert board.iter_pieces('black') == [board.board[7][4]]
+    board.pop()
+    assert board.pieces['black'][Queen] == {black_queen}
+    assert board.pieces == board_index(board)
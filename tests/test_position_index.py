@@ -0,0 +1,48 @@
+"""Position index over archived games (user-030)."""
+from game_archive import GameArchive, encode_move
+from position_index import PositionIndex
+
+E4, E5, D4, NF3 = ((6, 4), (4, 4)), ((1, 4), (3, 4)), ((6, 3), (4, 3)), ((7, 6), (5, 5))
+
+
+def append(archive, moves):
+    return archive.append([encode_move(*move) for move in moves])
+
+
+def after(chess_game, moves):
+    game = chess_game.ChessGame()
+    for move in moves:
+        game.make_move(*move)
+    return game
+
+
+def test_update_lookup_and_compact(tmp_path, chess_game):
+    archive = GameArchive(str(tmp_path / 'games.bin'))
+    append(archive, [E4, E5, NF3])
+    append(archive, [D4])
+    append(archive, [E4, E5])
+    index = PositionIndex(str(tmp_path / 'index'), segment_entries=2)
+    assert index.update(archive) == 3
+    assert index.games_indexed == 3
+    assert len(index) == 4 + 2 + 3 # Every ply plus the start position
+
+    assert index.lookup_game(chess_game.ChessGame()) == [(0, 0), (1, 0), (2, 0)]
+    assert index.lookup_game(after(chess_game, [E4, E5])) == [(0, 2), (2, 2)]
+    assert index.lookup_game(after(chess_game, [D4, E5])) == []
+    start = chess_game.ChessGame().zobrist_hash()
+    assert index.continuations(start, archive) == {encode_move(*E4): 2, encode_move(*D4): 1}
+
+    # Only the new game is indexed by the next update
+    append(archive, [D4])
+    assert index.update(archive) == 1
+    assert index.update(archive) == 0
+    assert index.lookup_game(after(chess_game, [D4])) == [(1, 1), (3, 1)]
+
+    entries, before = len(index), index.lookup(start)
+    index.compact()
+    assert len(index) == entries and index.lookup(start) == before
+    assert len(list((tmp_path / 'index').glob('segment_*.bin'))) == 1
+
+    reopened = PositionIndex(str(tmp_path / 'index'))
+    assert reopened.games_indexed == 4 and len(reopened) == entries
+    assert reopened.lookup_game(after(chess_game, [E4, E5])) == [(0, 2), (2, 2)]
@@ -0,0 +1,112 @@
+"""Zobrist hashing, repetitions and the 50-move clock (user-031)."""
+import random
+
+import pygame
+
+KNIGHT_SHUFFLE = [((7, 6), (5, 5)), ((0, 6), (2, 5)), ((5, 5), (7, 6)), ((2, 5), (0, 6))] # Nf3 Nf6 Ng1 Ng8
+
+
+def test_incremental_hash_matches_full_hash(chess_game):
+    rng = random.Random(11)
+    game = chess_game.ChessGame()
+    hashes = [game.position_hash]
+    for _ in range(100):
+        moves = game.generate_all_valid_moves(game.current_turn)
+        if game.game_over or not moves:
+            break
+        game.make_move(*rng.choice(moves))
+        assert game.position_hash == game.zobrist_hash()
+        hashes.append(game.position_hash)
+    assert game.position_history == hashes
+    while game.undo_move():
+        hashes.pop()
+        assert game.position_hash == hashes[-1] == game.zobrist_hash()
+
+
+def test_hash_depends_on_side_to_move(chess_game):
+    game = chess_game.ChessGame()
+    game.load_fen('4k3/8/8/8/8/8/8/4K3 w - - 0 1')
+    white = game.position_hash
+    game.load_fen('4k3/8/8/8/8/8/8/4K3 b - - 0 1')
+    assert game.position_hash == white ^ chess_game.ZOBRIST_BLACK_TO_MOVE
+
+
+def test_threefold_repetition(chess_game):
+    game = chess_game.ChessGame()
+    for move in KNIGHT_SHUFFLE:
+        game.make_move(*move)
+    assert game.is_repetition(2) and not game.is_repetition(3)
+    for move in KNIGHT_SHUFFLE:
+        game.make_move(*move)
+    assert game.is_repetition(3)
+    assert game.game_over and (game.winner, game.draw_reason) == ('draw', 'repetition')
+    game.undo_move() # Back to a position seen twice
+    assert not game.game_over and game.draw_reason is None
+    assert game.is_repetition(2) and not game.is_repetition(3)
+
+
+def test_capture_or_pawn_move_resets_clock_and_repetitions(chess_game):
+    game = chess_game.ChessGame()
+    for move in KNIGHT_SHUFFLE:
+        game.make_move(*move)
+    assert game.halfmove_clock == 4
+    game.make_move((6, 4), (4, 4)) # e4
+    assert game.halfmove_clock == 0
+    for move in KNIGHT_SHUFFLE:
+        game.make_move(*move)
+    # The start position is behind the pawn move, only the position after e4 repeats
+    assert game.halfmove_clock == 4
+    assert game.is_repetition(2) and not game.is_repetition(3)
+    game.undo_move()
+    assert game.halfmove_clock == 3
+
+
+def test_halfmove_clock_from_fen(chess_game):
+    game = chess_game.ChessGame()
+    game.load_fen('4k3/8/8/8/8/8/8/R3K3 w - - 42 80')
+    assert game.halfmove_clock == 42
+    game.make_move((7, 0), (6, 0))
+    assert game.halfmove_clock == 43
+    assert game.get_fen().split()[4] == '43'
+
+
+
+def test_search_root_makes_one_repeat_a_draw(chess_game):
+    game = chess_game.ChessGame()
+    game.make_move(*KNIGHT_SHUFFLE[0])
+    game.make_move(*KNIGHT_SHUFFLE[1])
+    root = len(game.position_history)
+    # Inside the search line the root position comes back once: a draw only thanks to search_root
+    for move in KNIGHT_SHUFFLE[2:] + KNIGHT_SHUFFLE[:2]:
+        game.make_move(*move)
+    assert not game.is_repetition(3)
+    assert game.is_repetition(3, root)
+
+
+def test_search_root_pre_root_repeat_needs_threefold(chess_game):
+    game = chess_game.ChessGame()
+    for move in KNIGHT_SHUFFLE:
+        game.make_move(*move)
+    root = len(game.position_history)
+    # The position after Nf3 was seen once, before the root: repeating it in the search is not a draw yet
+    game.make_move(*KNIGHT_SHUFFLE[0])
+    assert game.is_repetition(2)
+    assert not game.is_repetition(3, root)
+
+
+def test_fifty_move_rule_draw(chess_game):
+    game = chess_game.ChessGame()
+    game.load_fen('4k3/8/8/8/8/8/8/R3K3 w - - 99 80')
+    game.make_move((7, 0), (6, 0))
+    assert game.game_over and (game.winner, game.draw_reason) == ('draw', '50-move rule')
+    game.undo_move()
+    assert not game.game_over and game.draw_reason is None
+
+
+def test_game_over_message_names_the_draw(chess_game):
+    rendered = {}
+    for reason in ('stalemate', '50-move rule', 'repetition'):
+        screen = pygame.Surface((chess_game.BOARD_WIDTH, chess_game.BOARD_HEIGHT))
+        chess_game.draw_game_over_message(screen, 'draw', reason)
+        rendered[reason] = pygame.image.tobytes(screen, 'RGB')
+    assert len(set(rendered.values())) == 3
@@ -0,0 +1,97 @@
+"""Searcher: streaming analysis (user-034) and the pruning toggles (user-037)."""
+import threading
+import time
+
+import pytest
+
+from search import FEATURES, MATE_SCORE, MAX_DEPTH, Searcher, SearchLimits, analyse
+
+START = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1'
+
+
+def test_analyse_multipv(chess_game):
+    game = chess_game.ChessGame()
+    fen = game.get_fen()
+    results = list(analyse(game, SearchLimits(depth=3), multipv=3))
+    assert [result.depth for result in results] == [1, 2, 3]
+    for result in results:
+        assert len(result.lines) == 3
+        assert len({line.pv[0] for line in result.lines}) == 3
+        scores = [line.score for line in result.lines]
+        assert scores == sorted(scores, reverse=True)
+        assert result.move == result.lines[0].pv[0] and result.pv == result.lines[0].pv
+    assert game.get_fen() == fen # Searched in place and restored
+
+
+def test_analyse_fen_and_close():
+    stream = analyse(START, SearchLimits(depth=5))
+    first = next(stream)
+    assert first.depth == 1 and len(first.lines) == 1
+    stream.close() # Cancels the rest of the search
+
+
+class MateSearcher(Searcher):
+    """Scores the first ``mates`` root moves as mates, to reach the mate exits of iterate."""
+
+    def __init__(self, mates):
+        super().__init__()
+        self.mates = mates
+
+    def _search_root(self, game, moves, depth, multipv, *window):
+        scored = super()._search_root(game, moves, depth, multipv, *window)
+        return [(MATE_SCORE - 1, move) for _, move in scored[:self.mates]] + scored[self.mates:]
+
+
+def test_multipv_goes_on_past_a_mate_line():
+    # Only every line being a mate ends the analysis early
+    depths = [result.depth for result in analyse(START, SearchLimits(depth=3), 2, MateSearcher(1))]
+    assert depths == [1, 2, 3]
+    assert [result.depth for result in analyse(START, SearchLimits(depth=3), 2, MateSearcher(2))] == [1]
+    assert [result.depth for result in analyse(START, SearchLimits(depth=3), 1, MateSearcher(1))] == [1]
+
+
+def test_stop_from_another_thread():
+    searcher = Searcher()
+    threading.Timer(0.2, searcher.stop).start()
+    start = time.perf_counter()
+    results = list(analyse(START, SearchLimits(depth=MAX_DEPTH), multipv=2, searcher=searcher))
+    assert time.perf_counter() - start < 5
+    assert results and all(len(result.lines) == 2 for result in results)
+
+
+@pytest.mark.parametrize('enabled', [True, False])
+@pytest.mark.parametrize('fen, best', [
+    ('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1', ((6, 3), (3, 3))), # Free queen
+    ('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', ((7, 0), (0, 0))), # Mate in one
+])
+def test_features_find_the_same_move(chess_game, fen, best, enabled):
+    game = chess_game.ChessGame()
+    game.load_fen(fen)
+    searcher = Searcher(**dict.fromkeys(FEATURES, enabled))
+    assert all(getattr(searcher, feature) is enabled for feature in FEATURES)
+    assert searcher.search(game, SearchLimits(depth=3)).move == best
+    assert game.get_fen() == fen
+
+
+@pytest.mark.parametrize('feature', FEATURES)
+def test_each_toggle_keeps_the_result(chess_game, feature):
+    game = chess_game.ChessGame()
+    game.load_fen('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    result = Searcher(**{feature: False}).search(game, SearchLimits(depth=3))
+    assert result.move == ((6, 3), (3, 3)) and result.score == 5 # Rook against a bare king
+
+
+def test_pruning_searches_fewer_nodes(chess_game):
+    game = chess_game.ChessGame()
+    pruned = Searcher().search(game, SearchLimits(depth=4))
+    full = Searcher(**dict.fromkeys(FEATURES, False)).search(game, SearchLimits(depth=4))
+    assert pruned.nodes < full.nodes
+
+
+def test_null_move_only_passes_the_turn(chess_game):
+    game = chess_game.ChessGame()
+    key, history = game.position_hash, len(game.position_history)
+    game.make_null_move()
+    assert game.current_turn == 'b' and game.position_hash == key ^ chess_game.ZOBRIST_BLACK_TO_MOVE
+    game.undo_null_move()
+    assert (game.current_turn, game.position_hash, len(game.position_history)) == ('w', key, history)
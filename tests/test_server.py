@@ -0,0 +1,70 @@
+"""Multi-game server through the stand-in client (user-035)."""
+import asyncio
+
+from server import ChessClient, ChessServer
+
+
+def run_with_client(scenario):
+    """Starts a server on a free local port, runs ``scenario(client, server)`` and shuts both down."""
+    async def main():
+        server = ChessServer(workers=1)
+        port = await server.start('127.0.0.1', 0)
+        client = await ChessClient.connect('127.0.0.1', port)
+        try:
+            return await scenario(client, server)
+        finally:
+            await client.close()
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_game_against_the_ai():
+    async def scenario(client, server):
+        new = await client.request('new', ai=0)
+        assert new['ok'] and new['turn'] == 'w'
+        game = new['game']
+        moves = (await client.request('moves', game=game))['moves']
+        assert len(moves) == 20 and 'e2e4' in moves
+        played = await client.request('move', game=game, move='e2e4')
+        assert played['ok'] and played['turn'] == 'w' and not played['game_over']
+        assert played['reply'] in [f"{col}{row}{col2}{row2}" for col in 'abcdefgh' for row in '78'
+                                   for col2 in 'abcdefgh' for row2 in '5678']
+        state = await client.request('state', game=game)
+        assert state['fen'] == played['fen']
+        assert not (await client.request('move', game=game, move='e4e6'))['ok']
+        assert (await client.request('close', game=game))['ok']
+        assert not (await client.request('state', game=game))['ok']
+        assert server.sessions == {}
+    run_with_client(scenario)
+
+
+def test_pipelined_games_without_ai():
+    async def scenario(client, server):
+        games = [response['game'] for response in
+                 await asyncio.gather(*(client.request('new') for _ in range(5)))]
+        assert len(set(games)) == 5
+        replies = await asyncio.gather(*(client.request('move', game=game, move='g1f3') for game in games))
+        assert all(reply['ok'] and reply['reply'] is None and reply['turn'] == 'b' for reply in replies)
+        assert (await client.request('move', game=games[0], move='b8c6'))['turn'] == 'w'
+        assert not (await client.request('bogus'))['ok']
+    run_with_client(scenario)
+
+
+def test_bad_requests_get_an_error():
+    async def scenario(client, server):
+        client._writer.write(b'[1, 2]\n{not json\n')
+        for request in ({'game': [1]}, {'game': 12345}, {'fen': 'not a fen'}, {'ai': 7}):
+            cmd = 'new' if 'fen' in request or 'ai' in request else 'state'
+            response = await client.request(cmd, **request)
+            assert response['ok'] is False and response['error']
+        # The connection is still usable
+        assert (await client.request('new'))['ok']
+    run_with_client(scenario)
+
+
+def test_ai_moves_first_from_a_black_to_move_fen():
+    async def scenario(client, server):
+        new = await client.request('new', ai=0, fen='rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b - - 0 1')
+        assert new['ok'] and new['reply'] and new['turn'] == 'w'
+        assert (await client.request('move', game=new['game'], move='d2d4'))['ok']
+    run_with_client(scenario)
@@ -0,0 +1,37 @@
+"""Static exchange evaluation (user-038)."""
+import pytest
+
+
+@pytest.mark.parametrize('fen, move, expected', [
+    # Pawn takes an undefended knight
+    ('4k3/8/8/3n4/4P3/8/8/4K3 w - - 0 1', ((4, 4), (3, 3)), 3),
+    # Queen takes a pawn defended by a pawn
+    ('4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1', ((7, 3), (3, 3)), -8),
+    # Knight for knight
+    ('4k3/8/2p5/3n4/8/4N3/8/4K3 w - - 0 1', ((5, 4), (3, 3)), 0),
+    # Rook takes a pawn defended by a rook...
+    ('3rk3/8/8/3p4/8/8/3R4/4K3 w - - 0 1', ((6, 3), (3, 3)), -4),
+    # ...unless a second rook behind it recaptures (x-ray)
+    ('3rk3/8/8/3p4/8/8/3R4/3RK3 w - - 0 1', ((6, 3), (3, 3)), 1),
+    # Black to move, a bishop takes a rook defended by a pawn
+    ('4k3/8/8/1b6/8/3R4/2P5/4K3 b - - 0 1', ((3, 1), (5, 3)), 2),
+    # Quiet move onto a square the opponent attacks
+    ('4k3/8/8/8/2p5/8/8/3QK3 w - - 0 1', ((7, 3), (5, 1)), -9),
+])
+def test_static_exchange(chess_game, fen, move, expected):
+    game = chess_game.ChessGame()
+    game.load_fen(fen)
+    board = [row[:] for row in game.board]
+    assert game.static_exchange(*move) == expected
+    assert game.board == board
+
+
+def test_static_exchange_bounds(positions):
+    # Never more than the captured piece, never less than minus the moving piece plus the captured one
+    for game in positions:
+        for start, end in game.generate_all_valid_moves(game.current_turn):
+            if game.board[end[0]][end[1]] is None:
+                continue
+            captured = game.get_piece_value(game.board[end[0]][end[1]])
+            mover = game.get_piece_value(game.board[start[0]][start[1]])
+            assert captured - mover <= game.static_exchange(start, end) <= captured